@@ -1,54 +1,73 @@
 # analyze.py
 import argparse
 import os
+import sys
 import glob
+from pathlib import Path
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import plotly.graph_objects as go
-import plotly.express as px
-from dash import Dash, dcc, html
+from dash import Dash, ctx, dcc, html, no_update
 import dash.dependencies as deps
 
+# Fix import resolution when run as a script
+sys.path.append(str(Path(__file__).parent.parent.resolve()))
+
+from analysis import downsample
+from utils import metrics as metrics_io
+from utils.event_log import load_events
+from utils.run_cache import load_run
+from utils.sketches import load_sketches
+
 # -------------------------------
 # Load Metrics
 # -------------------------------
 def load_metrics(path):
-    metrics_file = os.path.join(path, "metrics.csv")
-    if not os.path.exists(metrics_file):
-        raise FileNotFoundError(f"metrics.csv not found in: {path}")
+    # metrics.csv or streamed metrics_parts/ chunks
+    return metrics_io.load_metrics(path)
 
-    df = pd.read_csv(metrics_file)
-    if "timestamp" in df.columns:
-        df["timestamp"] = pd.to_numeric(df["timestamp"], errors="coerce")
-    return df
+# -------------------------------
+# Load a run (metric-indexed, cached)
+# -------------------------------
+def load_run_data(path, refresh=False):
+    # parsed once into a columnar cache next to the run; see utils.run_cache
+    return load_run(path, refresh=refresh)
 
 # -------------------------------
 # Load events.log
 # -------------------------------
-def load_logs(path):
-    log_file = os.path.join(path, "events.log")
-    if not os.path.exists(log_file):
-        return []
-
-    with open(log_file, "r") as f:
-        return f.readlines()
+def load_logs(path, event_types=None, start=None, end=None):
+    # JSONL events, filtered through the events.idx offset index
+    return load_events(path, event_types=event_types, start=start, end=end)
 
 # -------------------------------
 # Summary Stats
 # -------------------------------
-def summary_stats(df, outdir):
+def summary_stats(run, outdir):
     stats = {}
     def p95(x): return x.quantile(0.95) if len(x) else 0
 
-    for metric in ["auth_latency", "turn_latency", "pubsub_delay"]:
-        d = df[df["metric"] == metric]["value"]
+    # metrics recorded as sketches only (METRICS_DROP_RAW) have no raw rows
+    sketches = load_sketches(outdir)
+
+    for metric in ["auth_latency", "turn_latency", "pubsub_delay", "game_server_wait", "queue_wait", "match_skill_delta"]:
+        d = run.values(metric)
+        if not len(d) and metric in sketches:
+            stats[f"{metric}_mean"] = sketches[metric].mean
+            stats[f"{metric}_95p"] = sketches[metric].quantile(0.95)
+            continue
         stats[f"{metric}_mean"] = d.mean() if len(d) else 0
         stats[f"{metric}_95p"] = p95(d)
 
-    q = df[df["metric"] == "queue_length"]["value"]
+    q = run.values("queue_length")
     stats["queue_max"] = q.max() if len(q) else 0
     stats["queue_mean"] = q.mean() if len(q) else 0
 
+    # time-weighted utilization is cumulative, so the last sample covers the whole run
+    u = run.values("game_server_utilization")  # already in time order
+    stats["game_server_utilization"] = u.iloc[-1] if len(u) else 0
+
     stats_df = pd.DataFrame([stats])
     csv_path = os.path.join(outdir, "summary_stats.csv")
     stats_df.to_csv(csv_path, index=False)
@@ -58,15 +77,14 @@ def summary_stats(df, outdir):
 # -------------------------------
 # Matplotlib plots
 # -------------------------------
-def plot_smoothed(df, metric, outdir, window=50):
-    d = df[df['metric'] == metric]
+def plot_smoothed(run, metric, outdir, window=50):
+    d = run.metric(metric)
     if d.empty: return
 
-    d = d.sort_values('timestamp')
-    d['rolling'] = d['value'].rolling(window=window, min_periods=1).mean()
+    rolling = d['value'].rolling(window=window, min_periods=1).mean()
 
     plt.figure(figsize=(10,5))
-    plt.plot(d['timestamp'], d['rolling'], label=f"{metric} (rolling)")
+    plt.plot(d['timestamp'], rolling, label=f"{metric} (rolling)")
     plt.scatter(d['timestamp'], d['value'], s=4, alpha=0.2)
     plt.title(f"{metric} (Smoothed)")
     plt.xlabel("Time")
@@ -78,8 +96,8 @@ def plot_smoothed(df, metric, outdir, window=50):
     plt.close()
     print(f"[OK] Saved: {path}")
 
-def plot_distribution(df, metric, outdir):
-    d = df[df['metric'] == metric]
+def plot_distribution(run, metric, outdir):
+    d = run.metric(metric)
     if d.empty: return
 
     plt.figure(figsize=(8,5))
@@ -96,9 +114,40 @@ def plot_distribution(df, metric, outdir):
 # -------------------------------
 # Plotly Dashboard
 # -------------------------------
-def launch_dashboard(df):
+DASHBOARD_POINTS = 2000  # max points per trace sent to the browser
+HIST_BINS = 50
+
+def _zoom_range(relayout):
+    """
+    (start, end) of the x-axis from a Graph's relayoutData; (None, None)
+    for a reset; None when the event does not touch the x-axis.
+    """
+    if not relayout:
+        return None
+    if relayout.get("xaxis.autorange"):
+        return None, None
+    if "xaxis.range[0]" in relayout:
+        return relayout["xaxis.range[0]"], relayout["xaxis.range[1]"]
+    if "xaxis.range" in relayout:
+        return tuple(relayout["xaxis.range"])
+    return None
+
+def launch_dashboard(run, max_points=DASHBOARD_POINTS):
     app = Dash(__name__)
-    metrics = df['metric'].unique()
+    metrics = run.metrics
+    series = {}  # metric -> (timestamps, values, rolling mean, histogram), built on first view
+
+    def _series(metric):
+        if metric not in series:
+            d = run.metric(metric)
+            v = d["value"].to_numpy(dtype=float)
+            series[metric] = (
+                d["timestamp"].to_numpy(dtype=float),
+                v,
+                d["value"].rolling(50).mean().to_numpy(dtype=float),
+                downsample.histogram(v, HIST_BINS),
+            )
+        return series[metric]
 
     app.layout = html.Div([
         html.H1("Simulation Analytics Dashboard", style={"textAlign": "center"}),
@@ -114,18 +163,40 @@ def launch_dashboard(df):
         dcc.Graph(id="distribution-plot")
     ])
 
+    # Zooming re-fetches the visible window at full detail (up to max_points
+    # per trace, LTTB-downsampled), so the browser never holds the raw series.
     @app.callback(
         deps.Output("time-series-plot", "figure"),
-        deps.Input("metric-dropdown", "value")
+        deps.Input("metric-dropdown", "value"),
+        deps.Input("time-series-plot", "relayoutData")
     )
-    def update_timeseries(metric):
-        d = df[df['metric'] == metric].sort_values('timestamp')
-        if d.empty: return go.Figure()
+    def update_timeseries(metric, relayout):
+        if ctx.triggered_id == "metric-dropdown":
+            zoom = (None, None)
+        else:
+            zoom = _zoom_range(relayout)
+            if zoom is None:
+                return no_update
+
+        t, v, rolling, _ = _series(metric)
+        if not len(t): return go.Figure()
+
+        sl = downsample.window(t, *zoom)
+        wt, wv, wr = t[sl], v[sl], rolling[sl]
+        raw = downsample.lttb(wt, wv, max_points)
+        finite = np.isfinite(wr)
+        smooth = downsample.lttb(wt[finite], wr[finite], max_points)
 
         fig = go.Figure()
-        fig.add_trace(go.Scatter(x=d['timestamp'], y=d['value'], mode='markers', name='raw', opacity=0.3))
-        fig.add_trace(go.Scatter(x=d['timestamp'], y=d['value'].rolling(50).mean(), mode='lines', name='smoothed'))
-        fig.update_layout(title=f"{metric} Over Time", xaxis_title="Time", yaxis_title="Value")
+        fig.add_trace(go.Scattergl(x=wt[raw], y=wv[raw], mode='markers', name='raw', opacity=0.3))
+        fig.add_trace(go.Scattergl(x=wt[finite][smooth], y=wr[finite][smooth], mode='lines', name='smoothed'))
+        fig.update_layout(
+            title=f"{metric} Over Time ({len(raw)} of {len(wt)} points shown)",
+            xaxis_title="Time", yaxis_title="Value",
+            uirevision=metric  # keep the user's zoom across re-renders
+        )
+        if zoom != (None, None):
+            fig.update_xaxes(range=list(zoom))
         return fig
 
     @app.callback(
@@ -133,10 +204,11 @@ def launch_dashboard(df):
         deps.Input("metric-dropdown", "value")
     )
     def update_distribution(metric):
-        d = df[df['metric'] == metric]
-        if d.empty: return go.Figure()
+        counts, edges = _series(metric)[3]
+        if not len(counts): return go.Figure()
 
-        fig = px.histogram(d, x="value", nbins=50, title=f"{metric} Distribution")
+        fig = go.Figure(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges)))
+        fig.update_layout(title=f"{metric} Distribution", xaxis_title="value", yaxis_title="count", bargap=0)
         return fig
 
     print("\n[INFO] Dashboard running at http://127.0.0.1:8050")
@@ -149,11 +221,21 @@ def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--run", required=False, help="Path to run folder (e.g., outputs/run_xxx)")
     parser.add_argument("--dashboard", action="store_true", help="Launch interactive dashboard")
+    parser.add_argument("--refresh", action="store_true", help="Rebuild the cached metrics file of the run")
+    parser.add_argument("--compare", nargs="+", metavar="RUN", help="Compare many run folders / glob patterns instead (see experiments.compare)")
+    parser.add_argument("--out", default=None, help="Output folder for --compare (default: outputs/compare)")
     args = parser.parse_args()
 
     # Resolve project root relative to this script
     PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
+    # Multi-run mode: align runs by scenario and aggregate with CIs
+    if args.compare:
+        from experiments.compare import compare_runs
+        run_paths = sorted({p for pattern in args.compare for p in glob.glob(pattern) if os.path.isdir(p)})
+        compare_runs(run_paths, args.out or os.path.join(PROJECT_ROOT, "outputs", "compare"))
+        return
+
     # Auto-detect latest run if not provided
     run_path = args.run
     if not run_path:
@@ -166,20 +248,20 @@ def main():
         raise Exception(f"Run folder not found: {run_path}")
 
     print(f"[INFO] Loading metrics from {run_path}...")
-    df = load_metrics(run_path)
+    run = load_run_data(run_path, refresh=args.refresh)
     logs = load_logs(run_path)
-    print(f"[INFO] Loaded {len(df)} metric records and {len(logs)} log lines")
+    print(f"[INFO] Loaded {len(run)} metric records and {len(logs)} events")
 
-    summary_stats(df, run_path)
+    summary_stats(run, run_path)
 
     # Matplotlib plots
-    for metric in ["auth_latency", "turn_latency", "pubsub_delay", "queue_length"]:
-        plot_smoothed(df, metric, run_path)
-        plot_distribution(df, metric, run_path)
+    for metric in ["auth_latency", "turn_latency", "pubsub_delay", "queue_length", "queue_wait"]:
+        plot_smoothed(run, metric, run_path)
+        plot_distribution(run, metric, run_path)
 
     # Launch interactive Plotly dashboard if requested
     if args.dashboard:
-        launch_dashboard(df)
+        launch_dashboard(run)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,54 @@
+# analysis/downsample.py
+"""
+Server-side reduction of large metric series for the dashboard.
+"""
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: indices of n_out points of (x, y)
+    that keep the visual shape of the series (peaks and dips survive).
+    x must be sorted. Returns all indices when the series is already small.
+    """
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+
+    # n_out - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            nxt_x = x[hi:edges[i + 2]].mean()
+            nxt_y = y[hi:edges[i + 2]].mean()
+        else:
+            nxt_x, nxt_y = x[n - 1], y[n - 1]
+        bx, by = x[lo:hi], y[lo:hi]
+        # twice the triangle area (a, candidate, next-bucket mean)
+        area = np.abs((x[a] - nxt_x) * (by - y[a]) - (x[a] - bx) * (nxt_y - y[a]))
+        a = lo + int(area.argmax())
+        idx[i + 1] = a
+    return idx
+
+
+def window(x: np.ndarray, start=None, end=None) -> slice:
+    """
+    Slice of the sorted array x covering start <= x <= end.
+    """
+    lo = 0 if start is None else int(np.searchsorted(x, start, side="left"))
+    hi = len(x) if end is None else int(np.searchsorted(x, end, side="right"))
+    return slice(lo, hi)
+
+
+def histogram(values: np.ndarray, bins: int = 50):
+    """
+    Precomputed (counts, bin_edges) of the finite values.
+    """
+    values = values[np.isfinite(values)]
+    if not len(values):
+        return np.zeros(0, dtype=np.int64), np.zeros(1)
+    return np.histogram(values, bins=bins)
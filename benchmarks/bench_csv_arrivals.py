@@ -0,0 +1,99 @@
+# benchmarks/bench_csv_arrivals.py
+"""
+Startup and replay time of the CSV arrival spawner.
+
+    python -m benchmarks.bench_csv_arrivals --players 10000000
+
+Writes a players.csv with the data_gen columns, then times:
+  rowwise - the original csv.DictReader spawner (one CSVPlayer and one
+            timeout per row)
+  cold    - spawn_players_from_csv parsing the columns in one shot and
+            writing arrivals.npy
+  warm    - spawn_players_from_csv memory-mapping arrivals.npy
+"startup" is the time until the first arrival is released, "total" the
+time to release every player into a broker that drops the messages.
+"""
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import simpy
+
+# Fix import resolution when run as a script
+sys.path.append(str(Path(__file__).parent.parent.resolve()))
+
+from sim_runner import CSVPlayer, spawn_players_from_csv
+
+
+class _NullBroker:
+    def __init__(self):
+        self.published = 0
+        self.first_at = None
+
+    def publish(self, topic, message, publisher_name):
+        if self.first_at is None:
+            self.first_at = time.perf_counter()
+        self.published += 1
+
+
+def _rowwise_spawner(env, broker, csv_data_path):
+    with open(os.path.join(csv_data_path, "players.csv"), newline="") as f:
+        for row in csv.DictReader(f):
+            player = CSVPlayer(
+                player_id=int(row["player_id"]),
+                skill=int(row.get("skill", 50)),
+                name=row.get("name", f"player_{row['player_id']}"),
+                arrival_time=float(row["arrival_time"])
+            )
+            wait = max(0, player.arrival_time - env.now)
+            if wait > 0:
+                yield env.timeout(wait)
+            broker.publish(topic="player_arrival", message={"type": "player_arrival", "payload": {"player": player}},
+                           publisher_name="sim_runner")
+
+
+def write_players(data_path, num_players, seed):
+    rng = np.random.default_rng(seed)
+    pd.DataFrame({
+        "player_id": np.arange(num_players),
+        "arrival_time": np.cumsum(rng.exponential(0.5, num_players)),
+        "auth_latency": rng.normal(90, 30, num_players),
+        "match_id": np.arange(num_players) // 2 + 1,
+    }).to_csv(os.path.join(data_path, "players.csv"), index=False)
+
+
+def run(spawner, data_path):
+    env = simpy.Environment()
+    broker = _NullBroker()
+    start = time.perf_counter()
+    env.process(spawner(env, broker, data_path))
+    env.run()
+    total = time.perf_counter() - start
+    return {"startup_s": broker.first_at - start, "total_s": total, "players": broker.published}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the CSV arrival spawner")
+    parser.add_argument("--players", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skip-rowwise", action="store_true", help="Skip the slow row-by-row baseline")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_players(tmp, args.players, args.seed)
+        cases = [] if args.skip_rowwise else [("rowwise", _rowwise_spawner)]
+        cases += [("cold", spawn_players_from_csv), ("warm", spawn_players_from_csv)]
+        for name, spawner in cases:
+            r = run(spawner, tmp)
+            print(f"{name:>8}: startup {r['startup_s']:7.2f}s  total {r['total_s']:7.2f}s  "
+                  f"{r['players'] / r['total_s']:10.0f} players/s")
+
+
+if __name__ == "__main__":
+    main()
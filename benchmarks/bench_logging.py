@@ -0,0 +1,67 @@
+# benchmarks/bench_logging.py
+"""
+Simulation throughput with logging on versus off.
+
+    python -m benchmarks.bench_logging --sim-time 2000
+
+Runs sim_runner.run_once once per log level (stdout is sent to /dev/null,
+so the "on" numbers include formatting and write cost but not a terminal)
+and reports wall time and SimPy events processed per second.
+Uses the CSV dataset from config.CSV_DATA_PATH; generate it first with
+python -m data_gen.generate_dataset.
+"""
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+import simpy
+
+# Fix import resolution when run as a script
+sys.path.append(str(Path(__file__).parent.parent.resolve()))
+
+from config import Scenario
+from sim_runner import run_once
+from utils import logger
+
+
+class _CountingEnvironment(simpy.Environment):
+    steps = 0
+
+    def step(self):
+        _CountingEnvironment.steps += 1
+        super().step()
+
+
+def run_level(level, scenario, seed):
+    logger.configure(level=level)
+    _CountingEnvironment.steps = 0
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        with mock.patch("simpy.Environment", _CountingEnvironment), contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            run_once(tmp, seed=seed, scenario=scenario)
+            wall = time.perf_counter() - start
+    return {"level": level, "wall_s": wall, "events": _CountingEnvironment.steps,
+            "events_per_s": _CountingEnvironment.steps / wall}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark simulation throughput with logging on vs off")
+    parser.add_argument("--sim-time", type=float, default=2000.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    scenario = Scenario().replace(sim_time=args.sim_time)
+    results = [run_level(level, scenario, args.seed) for level in ("DEBUG", "INFO", "OFF")]
+    for r in results:
+        print(f"{r['level']:>6}: {r['wall_s']:7.2f}s  {r['events']:9d} simpy events  {r['events_per_s']:10.0f} events/s")
+    on, off = results[0], results[-1]
+    print(f"speedup logging off vs DEBUG: {off['events_per_s'] / on['events_per_s']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# benchmarks/bench_metrics.py
+"""
+Memory per sample and save() time of MetricsCollector versus the previous
+tuple-per-sample layout.
+
+    python -m benchmarks.bench_metrics --samples 1000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+# Fix import resolution when run as a script
+sys.path.append(str(Path(__file__).parent.parent.resolve()))
+
+from utils.metrics import MetricsCollector
+
+
+class _TupleCollector:
+    """The previous layout: one (ts, value, meta_dict) tuple per sample."""
+
+    def __init__(self, out_dir):
+        self.out_dir = out_dir
+        self.metrics = {}
+
+    def record(self, metric_name, value, timestamp=None, **meta):
+        self.metrics.setdefault(metric_name, []).append((timestamp, value, meta or {}))
+
+    def save(self):
+        rows = []
+        for key, values in self.metrics.items():
+            for ts, val, meta in values:
+                row = {"metric": key, "timestamp": ts, "value": val}
+                row.update(meta)
+                rows.append(row)
+        path = os.path.join(self.out_dir, "metrics.csv")
+        pd.DataFrame(rows).to_csv(path, index=False)
+        return path
+
+
+def _fill(collector, n):
+    # mix resembling the metrics run_once records: turns, deliveries, queue samples
+    for i in range(n):
+        ts = i * 0.01
+        kind = i % 4
+        if kind == 0:
+            collector.record("turn_latency", 5.0 + (i % 13) * 0.1, timestamp=ts, match_id=f"match-{i // 40}", turn=i % 20)
+        elif kind == 1:
+            collector.record("pubsub_delivered", 1, timestamp=ts, topic="turn_completed", delivered_to="<GameLogicService>")
+        elif kind == 2:
+            collector.record("queue_length", i % 7, timestamp=ts)
+        else:
+            collector.record("queue_wait", 0.3 + (i % 11) * 0.05, timestamp=ts, player_id=i // 2)
+
+
+def measure(cls, n):
+    with tempfile.TemporaryDirectory() as tmp:
+        tracemalloc.start()
+        collector = cls(tmp)
+        _fill(collector, n)
+        held, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        collector.save()
+        save_s = time.perf_counter() - start
+    return held / n, save_s
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MetricsCollector memory and save time")
+    parser.add_argument("--samples", type=int, default=1000000)
+    args = parser.parse_args()
+
+    old_bytes, old_save = measure(_TupleCollector, args.samples)
+    new_bytes, new_save = measure(MetricsCollector, args.samples)
+    print(f"  tuples: {old_bytes:8.1f} bytes/sample  save {old_save:6.2f}s")
+    print(f"columnar: {new_bytes:8.1f} bytes/sample  save {new_save:6.2f}s")
+    print(f"memory: {old_bytes / new_bytes:.1f}x less, save: {old_save / new_save:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# benchmarks/bench_pubsub.py
+"""
+Compare the PubSub delivery engines on a synthetic publish load.
+
+    python -m benchmarks.bench_pubsub --messages 200000 --subscribers 2
+
+Reports wall time, deliveries/sec and SimPy events processed per engine,
+plus the delivery-delay mean/std and retry rate so the engines can be
+checked for statistical equivalence.
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import simpy
+
+# Fix import resolution when run as a script
+sys.path.append(str(Path(__file__).parent.parent.resolve()))
+
+from config import Scenario
+from services.pubsub import PubSub
+from utils.metrics import MetricsCollector
+from utils.variates import VariateBank
+
+
+class _Inbox:
+    """Stand-in for a simpy.Store that only measures delivery delay."""
+
+    def __init__(self, env, delays):
+        self.env = env
+        self.delays = delays
+
+    def put(self, item):
+        message, _ = item
+        self.delays.append(self.env.now - message["ts"])
+
+
+class _Sink:
+    def __init__(self, env, delays):
+        self.inbox = _Inbox(env, delays)
+
+
+class _CountingEnvironment(simpy.Environment):
+    def __init__(self):
+        super().__init__()
+        self.steps = 0
+
+    def step(self):
+        self.steps += 1
+        super().step()
+
+
+def _publisher(env, broker, n, interval):
+    for i in range(n):
+        yield env.timeout(interval)
+        broker.publish("bench", {"type": "bench", "ts": env.now}, publisher_name="bench")
+
+
+def run_engine(engine, messages, subscribers, interval, seed):
+    env = _CountingEnvironment()
+    delays = []
+    with tempfile.TemporaryDirectory() as tmp:
+        metrics = MetricsCollector(tmp)
+        broker = PubSub(env, metrics, scenario=Scenario().replace(pubsub_engine=engine), variates=VariateBank(seed))
+        for _ in range(subscribers):
+            broker.subscribe("bench", _Sink(env, delays))
+        env.process(_publisher(env, broker, messages, interval))
+
+        start = time.perf_counter()
+        env.run()
+        wall = time.perf_counter() - start
+
+    retries = len(metrics.metrics.get("pubsub_retry", []))
+    return {
+        "engine": engine,
+        "wall_s": wall,
+        "deliveries": len(delays),
+        "deliveries_per_s": len(delays) / wall,
+        "simpy_events": env.steps,
+        "sim_events_per_s": env.steps / wall,
+        "delay_mean": statistics.fmean(delays),
+        "delay_std": statistics.pstdev(delays),
+        "retry_rate": retries / (messages * subscribers),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PubSub delivery engines")
+    parser.add_argument("--messages", type=int, default=200000)
+    parser.add_argument("--subscribers", type=int, default=2)
+    parser.add_argument("--interval", type=float, default=0.01, help="Sim seconds between publishes")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    results = [run_engine(e, args.messages, args.subscribers, args.interval, args.seed) for e in ("process", "heap")]
+    for r in results:
+        print(
+            f"{r['engine']:>8}: {r['wall_s']:7.2f}s  {r['deliveries_per_s']:10.0f} deliveries/s  "
+            f"{r['simpy_events']:9d} simpy events  delay mean={r['delay_mean']:.4f} std={r['delay_std']:.4f}  "
+            f"retry rate={r['retry_rate']:.4f}"
+        )
+    base, heap = results
+    print(f"speedup (deliveries/s): {heap['deliveries_per_s'] / base['deliveries_per_s']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# benchmarks/bench_records.py
+"""
+Memory per in-flight entity: the original dict-based players and nested
+dict messages versus the utils.records types.
+
+    python -m benchmarks.bench_records --entities 1000000
+
+Allocates N of each entity (players, player_arrival messages wrapping
+them, match_created messages, turn_completed messages) and reports the
+bytes per entity measured with tracemalloc.
+"""
+import argparse
+import gc
+import sys
+import tracemalloc
+from pathlib import Path
+
+# Fix import resolution when run as a script
+sys.path.append(str(Path(__file__).parent.parent.resolve()))
+
+from utils.records import Match, Message, Player, TurnCompleted
+
+
+class _DictPlayer:
+    """The original Player: one __dict__ per instance."""
+
+    def __init__(self, player_id, skill=50, name=None, arrival_time=None):
+        self.id = player_id
+        self.skill = skill
+        self.name = name if name is not None else f"player_{player_id}"
+        self.arrival_time = arrival_time
+        self.auth_latency = None
+        self.match_id = None
+
+
+def _legacy(n):
+    players = [_DictPlayer(i, 50, arrival_time=float(i)) for i in range(n)]
+    return {
+        "player": lambda: [_DictPlayer(i, 50, arrival_time=float(i)) for i in range(n)],
+        "player_arrival message": lambda: [{"type": "player_arrival", "payload": {"player": p}} for p in players],
+        "match_created message": lambda: [
+            {"type": "match_created", "payload": {"match_id": i, "players": [players[i], players[i - 1]], "ts": float(i)}}
+            for i in range(n)],
+        "turn_completed message": lambda: [
+            {"type": "turn_completed", "payload": {"match_id": i, "turn": 3, "by": i, "ts": float(i)}} for i in range(n)],
+    }
+
+
+def _records(n):
+    players = [Player(i, 50, arrival_time=float(i)) for i in range(n)]
+    return {
+        "player": lambda: [Player(i, 50, arrival_time=float(i)) for i in range(n)],
+        "player_arrival message": lambda: [Message("player_arrival", p) for p in players],
+        "match_created message": lambda: [
+            Message("match_created", Match(i, [players[i], players[i - 1]], float(i))) for i in range(n)],
+        "turn_completed message": lambda: [
+            Message("turn_completed", TurnCompleted(i, 3, i, float(i))) for i in range(n)],
+    }
+
+
+def measure(build, n):
+    """Bytes per entity allocated by build() (the list itself excluded)."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    entities = build()
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    overhead = sys.getsizeof(entities)
+    del entities
+    return (allocated - overhead) / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark memory per player and per message")
+    parser.add_argument("--entities", type=int, default=1_000_000)
+    args = parser.parse_args()
+    n = args.entities
+
+    legacy, records = _legacy(n), _records(n)
+    print(f"{'entity':>24}  {'dict-based':>11}  {'records':>9}  saving")
+    for name in legacy:
+        old, new = measure(legacy[name], n), measure(records[name], n)
+        print(f"{name:>24}  {old:9.0f} B  {new:7.0f} B  {1 - new / old:6.0%}")
+
+
+if __name__ == "__main__":
+    main()
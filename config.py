@@ -3,6 +3,7 @@ Configuration parameters for the simulation.
 Tweak these to run experiments.
 """
 import math
+from dataclasses import dataclass, asdict, fields, replace
 
 # -----------------------
 # Simulation parameters
@@ -14,13 +15,36 @@ RANDOM_SEED = 42
 # Player arrival
 # -----------------------
 PLAYER_ARRIVAL_RATE = 1/6.0  
+SYNTHETIC_MAX_PLAYERS = 100  # cap on players spawned by the synthetic spawner
+
+# time-varying arrivals (utils/arrivals.py); PLAYER_ARRIVAL_RATE is the base rate
+ARRIVAL_MODEL = "constant"   # "constant", "diurnal", "piecewise" or "empirical"
+ARRIVAL_PERIOD = 86400.0     # seconds per cycle (diurnal; repeats piecewise/empirical curves, 0 = no repeat)
+ARRIVAL_AMPLITUDE = 0.5      # diurnal swing: rate varies between base*(1-a) and base*(1+a)
+ARRIVAL_PEAK_TIME = 72000.0  # diurnal peak, seconds into the cycle (20:00)
+ARRIVAL_PIECEWISE_TIMES = ()  # piecewise breakpoints in seconds, e.g. ("0", "3600", "7200")
+ARRIVAL_PIECEWISE_RATES = ()  # players/second from each breakpoint on
+ARRIVAL_RATE_CSV = ""        # empirical curve: CSV with time (s) and rate (players/s) columns
+
+# compound burst on top of any model, e.g. a launch-day spike
+BURST_START = 0.0            # seconds
+BURST_DURATION = 0.0         # seconds (0 = no burst)
+BURST_MULTIPLIER = 5.0       # rate multiplier at the start of the burst
+BURST_DECAY = 0.0            # exponential decay time constant in seconds (0 = flat burst)
 
 # -----------------------
 # Match parameters
 # -----------------------
 PLAYERS_PER_MATCH = 2        # head-to-head game
-MATCHMAKING_BATCH_TIMEOUT = 10.0  # seconds before forcing a match from queued players
-MATCHMAKER_CAPACITY = 4      # how many matches matchmaking can handle in parallel
+MATCHMAKING_BATCH_TIMEOUT = 10.0  # seconds a player waits before the timeout action fires
+MATCHMAKER_CAPACITY = 4      # how many matches matchmaking can handle in parallel (worker pool size)
+MATCHMAKING_MODE = "fifo"    # "fifo" or "skill"
+MATCHMAKING_TIMEOUT_ACTION = "none"  # "none", "backfill" (bots), "relax" (ignore skill window) or "drop"
+
+# skill mode: allowed skill spread grows with the longest wait in the group
+SKILL_WINDOW_BASE = 5.0      # skill points accepted immediately
+SKILL_WINDOW_GROWTH = 1.0    # extra skill points per second waited
+SKILL_WINDOW_MAX = 50.0      # never match players further apart than this
 
 # -----------------------
 # Game parameters
@@ -28,6 +52,7 @@ MATCHMAKER_CAPACITY = 4      # how many matches matchmaking can handle in parall
 AVG_TURNS_PER_MATCH = 7
 AVG_TIME_PER_TURN = 5.0      # seconds
 TURN_TIME_STD = 1.5
+GAME_SERVER_SLOTS = 32       # matches the game-server fleet can host at once
 
 # -----------------------
 # Pub/Sub delays/loss
@@ -37,15 +62,132 @@ PUBSUB_DELAY_STD = 0.2
 PUBSUB_LOSS_PROB = 0.02      # 2% message loss
 PUBSUB_MAX_RETRIES = 3
 PUBSUB_RETRY_DELAY = 1.0
+PUBSUB_ENGINE = "heap"       # "heap" (single broker process) or "process" (one process per delivery)
 
 # -----------------------
 # Storage latencies
 # -----------------------
 STORAGE_WRITE_MEAN = 0.1
 STORAGE_WRITE_STD = 0.05
+STORAGE_ENGINE = "unbounded"  # "unbounded" (every write in parallel) or "pool" (bounded connection pool)
+
+# pool engine
+STORAGE_POOL_SIZE = 8         # database connections; writes queue for a free one
+STORAGE_CONTENTION = 0.5      # write latency grows by up to this fraction as the pool fills
+STORAGE_GROUP_COMMIT = False  # commit concurrently queued writes together
+STORAGE_BATCH_MAX = 32        # most writes per group commit
+STORAGE_BATCH_WINDOW = 0.0    # seconds a commit holds its connection to gather more writes
+STORAGE_BATCH_ITEM_COST = 0.002  # extra commit time per additional write in a batch
+
+# -----------------------
+# Metrics output
+# -----------------------
+METRICS_STREAMING = False        # flush metrics/events to disk in chunks during the run
+METRICS_CHUNK_SIZE = 100_000     # buffered samples + events per flushed chunk
+METRICS_FLUSH_INTERVAL = 0.0     # also flush every N simulated seconds (0 = off)
+# latency metrics tracked in constant-memory quantile sketches (quantiles.csv / sketches.json)
+METRICS_SKETCHES = ("auth_latency", "turn_latency", "pubsub_delay", "queue_wait", "game_server_wait")
+METRICS_DROP_RAW = ()            # metrics kept only as sketches, no raw samples
+
+# -----------------------
+# Logging
+# -----------------------
+LOG_LEVEL = "DEBUG"      # DEBUG (per-turn/per-message lines), INFO, WARNING, ERROR or OFF
+LOG_CATEGORIES = ()      # only log these categories (empty = all), e.g. ("matchmaking", "runner")
+LOG_CONSOLE = True       # print log lines; False keeps only the structured events
 
 # -----------------------
 # CSV-driven simulation (new)
 # -----------------------
 USE_CSV_DATA = True
 CSV_DATA_PATH = "data/output"  # folder containing players.csv, matches.csv, turns.csv
+REPLAY_TRACE = False     # replay turn durations, dropouts and pubsub delays from matches/turns in CSV_DATA_PATH
+TRACE_DELAY_SCALE = 0.001  # trace pubsub_delay units -> seconds (data_gen writes milliseconds)
+
+
+# -----------------------
+# Scenario object
+# -----------------------
+@dataclass(frozen=True)
+class Scenario:
+    """
+    One complete set of simulation knobs, passed into the services instead of
+    having them read the module constants above at import time.
+    Scenario() reproduces the constants; use replace() to derive variants.
+    """
+    sim_time: float = SIM_TIME
+    random_seed: int = RANDOM_SEED
+    player_arrival_rate: float = PLAYER_ARRIVAL_RATE
+    synthetic_max_players: int = SYNTHETIC_MAX_PLAYERS
+    arrival_model: str = ARRIVAL_MODEL
+    arrival_period: float = ARRIVAL_PERIOD
+    arrival_amplitude: float = ARRIVAL_AMPLITUDE
+    arrival_peak_time: float = ARRIVAL_PEAK_TIME
+    arrival_piecewise_times: tuple = ARRIVAL_PIECEWISE_TIMES
+    arrival_piecewise_rates: tuple = ARRIVAL_PIECEWISE_RATES
+    arrival_rate_csv: str = ARRIVAL_RATE_CSV
+    burst_start: float = BURST_START
+    burst_duration: float = BURST_DURATION
+    burst_multiplier: float = BURST_MULTIPLIER
+    burst_decay: float = BURST_DECAY
+    players_per_match: int = PLAYERS_PER_MATCH
+    matchmaking_batch_timeout: float = MATCHMAKING_BATCH_TIMEOUT
+    matchmaker_capacity: int = MATCHMAKER_CAPACITY
+    matchmaking_mode: str = MATCHMAKING_MODE
+    matchmaking_timeout_action: str = MATCHMAKING_TIMEOUT_ACTION
+    skill_window_base: float = SKILL_WINDOW_BASE
+    skill_window_growth: float = SKILL_WINDOW_GROWTH
+    skill_window_max: float = SKILL_WINDOW_MAX
+    avg_turns_per_match: float = AVG_TURNS_PER_MATCH
+    avg_time_per_turn: float = AVG_TIME_PER_TURN
+    turn_time_std: float = TURN_TIME_STD
+    game_server_slots: int = GAME_SERVER_SLOTS
+    pubsub_delay_mean: float = PUBSUB_DELAY_MEAN
+    pubsub_delay_std: float = PUBSUB_DELAY_STD
+    pubsub_loss_prob: float = PUBSUB_LOSS_PROB
+    pubsub_max_retries: int = PUBSUB_MAX_RETRIES
+    pubsub_retry_delay: float = PUBSUB_RETRY_DELAY
+    pubsub_engine: str = PUBSUB_ENGINE
+    storage_write_mean: float = STORAGE_WRITE_MEAN
+    storage_write_std: float = STORAGE_WRITE_STD
+    storage_engine: str = STORAGE_ENGINE
+    storage_pool_size: int = STORAGE_POOL_SIZE
+    storage_contention: float = STORAGE_CONTENTION
+    storage_group_commit: bool = STORAGE_GROUP_COMMIT
+    storage_batch_max: int = STORAGE_BATCH_MAX
+    storage_batch_window: float = STORAGE_BATCH_WINDOW
+    storage_batch_item_cost: float = STORAGE_BATCH_ITEM_COST
+    metrics_streaming: bool = METRICS_STREAMING
+    metrics_chunk_size: int = METRICS_CHUNK_SIZE
+    metrics_flush_interval: float = METRICS_FLUSH_INTERVAL
+    metrics_sketches: tuple = METRICS_SKETCHES
+    metrics_drop_raw: tuple = METRICS_DROP_RAW
+    use_csv_data: bool = USE_CSV_DATA
+    csv_data_path: str = CSV_DATA_PATH
+    replay_trace: bool = REPLAY_TRACE
+    trace_delay_scale: float = TRACE_DELAY_SCALE
+
+    def replace(self, **overrides) -> "Scenario":
+        """
+        Return a copy with the given fields overridden.
+        Values are coerced to the field's annotated type.
+        """
+        known = {f.name: f for f in fields(self)}
+        coerced = {}
+        for key, value in overrides.items():
+            if key not in known:
+                raise ValueError(f"Unknown scenario parameter: {key}")
+            kind = known[key].type
+            if kind is int and not isinstance(value, bool):
+                value = int(round(float(value)))
+            elif kind is bool and isinstance(value, str):
+                value = value.strip().lower() in ("1", "true", "yes")
+            elif kind is tuple and isinstance(value, str):
+                value = tuple(v.strip() for v in value.split(",") if v.strip())
+            else:
+                value = kind(value)
+            coerced[key] = value
+        return replace(self, **coerced)
+
+    def to_dict(self):
+        return asdict(self)
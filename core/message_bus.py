@@ -1,6 +1,7 @@
 # core/message_bus.py
 import simpy
 import random
+from utils.records import Message
 
 class Network:
     """
@@ -13,7 +14,7 @@ class Network:
         self.delay_std = delay_std
         self.loss_prob = loss_prob
 
-    def send(self, src: str, dst, msg: dict):
+    def send(self, src: str, dst, msg: Message):
         """
         Deliver message to destination service inbox after network delay.
         """
@@ -23,7 +24,7 @@ class Network:
             return  # message lost
         self.env.process(self._deliver(dst, msg, src, delay))
 
-    def _deliver(self, dst, msg: dict, src: str, delay: float):
+    def _deliver(self, dst, msg: Message, src: str, delay: float):
         yield self.env.timeout(delay)
         self.metrics.log_event(f"{self.env.now:.3f}: NETWORK delivered {msg} from {src} -> {dst.name} after {delay:.3f}s")
         yield dst.inbox.put((msg, src, self.env.now, delay))
@@ -52,6 +53,6 @@ class PubSubBroker:
         """
         subscribers = self.topics.get(topic, [])
         self.metrics.log_event(f"{self.env.now:.3f}: BROKER publishing {topic} to {len(subscribers)} subs")
-        msg = {"type": topic, "payload": payload}
+        msg = Message(topic, payload)
         for sub in subscribers:
             self.network.send(src, sub, msg)
@@ -1,13 +1,55 @@
 # data_gen/arrivals.py
 import numpy as np
 from .config import CONFIG
+from utils.arrivals import ArrivalProcess, make_rate_curve
 
-def generate_arrival_times():
-    """Generate player arrival timestamps using a Poisson process."""
+def generate_arrival_times(rng=None, num=None, start=0.0):
+    """
+    Generate player arrival timestamps using a Poisson process.
+    Draws from rng (a np.random.Generator) if given, else the global np.random.
+    Timestamps continue from start (the previous block's last arrival).
+    """
     lam = CONFIG["arrival_rate_per_min"] / 60  # per-second rate
-    num = CONFIG["num_players"]
+    num = CONFIG["num_players"] if num is None else num
 
-    inter_arrivals = np.random.exponential(1 / lam, size=num)
+    inter_arrivals = (rng or np.random).exponential(1 / lam, size=num)
+    if start:
+        # accumulate from start so blocks add up exactly like one long cumsum
+        inter_arrivals = np.concatenate(([start], inter_arrivals))
+        return np.cumsum(inter_arrivals)[1:]
     timestamps = np.cumsum(inter_arrivals)
 
     return timestamps
+
+
+def arrival_rate_curve():
+    """
+    Rate curve (players/second) described by CONFIG, or None for the plain
+    constant-rate process above.
+    """
+    return make_rate_curve(
+        CONFIG["arrival_model"], CONFIG["arrival_rate_per_min"] / 60,
+        amplitude=CONFIG["arrival_amplitude"], period=CONFIG["arrival_period"],
+        peak_time=CONFIG["arrival_peak_time"], piecewise_times=CONFIG["arrival_piecewise_times"],
+        piecewise_rates=[r / 60 for r in CONFIG["arrival_piecewise_rates_per_min"]],
+        rate_csv=CONFIG["arrival_rate_csv"], burst_start=CONFIG["burst_start"],
+        burst_duration=CONFIG["burst_duration"], burst_multiplier=CONFIG["burst_multiplier"],
+        burst_decay=CONFIG["burst_decay"],
+    )
+
+
+def arrival_times(rng, curve=None, start=0.0):
+    """
+    Return a function num -> next num arrival timestamps, continuing across
+    calls: the constant-rate process if curve is None, else thinning
+    against the curve (utils.arrivals.ArrivalProcess).
+    """
+    if curve is None:
+        clock = [start]
+
+        def take(num):
+            times = generate_arrival_times(rng, num, start=clock[0])
+            clock[0] = times[-1]
+            return times
+        return take
+    return ArrivalProcess(curve, rng, start=start).take
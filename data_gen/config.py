@@ -5,6 +5,21 @@ CONFIG = {
     # Player arrivals per minute (Poisson λ)
     "arrival_rate_per_min": 120,  # 2 players/sec
 
+    # Time-varying arrivals (utils/arrivals.py); arrival_rate_per_min is the base rate
+    "arrival_model": "constant",        # constant, diurnal, piecewise or empirical
+    "arrival_period": 86400.0,          # seconds per cycle (0 = piecewise/empirical curve does not repeat)
+    "arrival_amplitude": 0.5,           # diurnal swing around the base rate
+    "arrival_peak_time": 72000.0,       # diurnal peak, seconds into the cycle
+    "arrival_piecewise_times": (),      # breakpoints (seconds)
+    "arrival_piecewise_rates_per_min": (),  # arrivals/min from each breakpoint on
+    "arrival_rate_csv": "",             # empirical curve: time (s), rate (players/s) columns
+
+    # Burst on top of the curve, e.g. a launch-day spike (duration 0 = off)
+    "burst_start": 0.0,
+    "burst_duration": 0.0,
+    "burst_multiplier": 5.0,
+    "burst_decay": 0.0,                 # exponential decay time constant (s), 0 = flat
+
     # Match duration distribution (seconds)
     "match_duration_mean": 180,   # avg 3 min
     "match_duration_std": 60,
@@ -12,3 +12,7 @@ def lognormal_from_mean_std(mean, std):
     mu = np.log(mean**2 / phi)
     sigma = np.sqrt(np.log(phi**2 / mean**2))
     return np.random.lognormal(mu, sigma)
+
+def clipped_normal_array(rng, mean, std, size, min_val=0):
+    """Vectorized clipped_normal: size draws from a np.random.Generator."""
+    return np.maximum(rng.normal(mean, std, size), min_val)
@@ -5,3 +5,7 @@ from .config import CONFIG
 def sample_dropout():
     """Return True if a player drops mid-match."""
     return np.random.random() < CONFIG["dropout_prob"]
+
+def sample_dropouts(rng, n):
+    """Vectorized sample_dropout: one bool per match."""
+    return rng.random(n) < CONFIG["dropout_prob"]
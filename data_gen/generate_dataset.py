@@ -1,38 +1,109 @@
 # data_gen/generate_dataset.py
+import argparse
 import csv
+import shutil
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
+import pandas as pd
 from pathlib import Path
-from data_gen.arrivals import generate_arrival_times
-from data_gen.turns import generate_turn_durations, estimate_turn_count
-from data_gen.latency import sample_auth_latency, sample_pubsub_latency
-from data_gen.dropout import sample_dropout
+from data_gen.arrivals import generate_arrival_times, arrival_rate_curve, arrival_times
+from data_gen.turns import generate_turn_durations, estimate_turn_count, generate_turn_durations_array, estimate_turn_counts
+from data_gen.latency import sample_auth_latency, sample_pubsub_latency, sample_auth_latencies, sample_pubsub_latencies
+from data_gen.dropout import sample_dropout, sample_dropouts
 from data_gen.config import CONFIG
+from data_gen.writers import FORMATS, TableWriter
+from utils.arrivals import ARRIVAL_MODELS
 
+DEFAULT_CHUNK_PLAYERS = 100_000
 
-def generate_dataset(outdir=None, seed: int = 42):
+PLAYER_COLUMNS = ["player_id", "arrival_time", "auth_latency", "match_id"]
+MATCH_COLUMNS = ["match_id", "p1", "p2", "start_time", "duration", "turns", "dropout"]
+TURN_COLUMNS = ["turn_id", "match_id", "turn_index", "start_time", "duration", "pubsub_delay"]
+
+
+class DataStreams:
     """
-    Generate synthetic dataset for the turn-based multiplayer simulation.
-    Produces players.csv, matches.csv, and turns.csv.
+    One independent np.random.Generator per generated quantity, all derived
+    from one seed. Each stream is consumed in order across blocks, so the
+    dataset does not depend on how it is split into chunks.
     """
+    NAMES = ("arrival", "auth", "duration", "dropout", "turn", "pubsub")
 
-    np.random.seed(seed)  # Reproducibility
+    def __init__(self, seed):
+        seed_seq = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        # same children as seed_seq.spawn() on a fresh sequence, without advancing
+        # its spawn counter, so one shard seed can be reused across passes
+        for k, name in enumerate(self.NAMES):
+            child = np.random.SeedSequence(seed_seq.entropy, spawn_key=seed_seq.spawn_key + (k,),
+                                           pool_size=seed_seq.pool_size)
+            setattr(self, name, np.random.default_rng(child))
 
-    # Default output folder: data/output/ under project root
-    if outdir is None:
-        outdir = Path(__file__).parent.parent / "data" / "output"
-    else:
-        outdir = Path(outdir)
-    
-    outdir.mkdir(parents=True, exist_ok=True)
 
-    # -------------------------
-    # 1. Player arrivals
-    # -------------------------
-    arrivals = generate_arrival_times()
+def build_tables(streams, arrivals, first_player_id=0, first_match_id=1, first_turn_id=1):
+    """
+    Vectorized match/turn generation for a block of arrivals.
+    Players are paired sequentially; every random quantity is drawn as one
+    array from its DataStreams stream and turn start times come from a
+    segmented cumsum.
+    Returns (players, matches, turns) DataFrames with the CSV columns.
+    """
+    num_matches = len(arrivals) // 2
+    n = num_matches * 2
+
+    # Authentication latency, match start once both players are in
+    arrival = arrivals[:n]
+    auth = sample_auth_latencies(streams.auth, n)
+    start_time = (arrival + auth).reshape(num_matches, 2).max(axis=1)
+
+    # Match duration (min 60s), turn counts, dropout
+    match_duration = np.maximum(streams.duration.normal(CONFIG["match_duration_mean"], CONFIG["match_duration_std"], num_matches), 60)
+    turn_count = estimate_turn_counts(match_duration)
+    dropout = sample_dropouts(streams.dropout, num_matches)
+
+    # Turns: one flat array for the whole block
+    num_turns = int(turn_count.sum())
+    turn_duration = generate_turn_durations_array(streams.turn, num_turns)
+    pubsub_delay = sample_pubsub_latencies(streams.pubsub, num_turns)
+
+    first_turn = np.cumsum(turn_count) - turn_count   # offset of each match's first turn
+    elapsed = np.cumsum(turn_duration) - turn_duration  # exclusive running sum over the block
+    elapsed -= np.repeat(elapsed[first_turn], turn_count)  # ... restarted at every match
+    turn_start = np.repeat(start_time, turn_count) + elapsed
 
-    # -------------------------
-    # 2. Create matches: pair players sequentially
-    # -------------------------
+    match_ids = np.arange(first_match_id, first_match_id + num_matches)
+    player_ids = np.arange(first_player_id, first_player_id + n)
+
+    players = pd.DataFrame({
+        "player_id": player_ids,
+        "arrival_time": arrival,
+        "auth_latency": auth,
+        "match_id": np.repeat(match_ids, 2),
+    })
+    matches = pd.DataFrame({
+        "match_id": match_ids,
+        "p1": player_ids[0::2],
+        "p2": player_ids[1::2],
+        "start_time": start_time,
+        "duration": match_duration,
+        "turns": turn_count,
+        "dropout": dropout,
+    })
+    turns = pd.DataFrame({
+        "turn_id": np.arange(first_turn_id, first_turn_id + num_turns),
+        "match_id": np.repeat(match_ids, turn_count),
+        "turn_index": np.arange(num_turns) - np.repeat(first_turn, turn_count) + 1,
+        "start_time": turn_start,
+        "duration": turn_duration,
+        "pubsub_delay": pubsub_delay,
+    })
+    return players, matches, turns
+
+
+def _generate_rows_loop(arrivals):
+    """
+    Original per-match loop on the global np.random stream
+    (kept to reproduce datasets generated before the vectorized path).
+    """
     num_matches = len(arrivals) // 2
     players, matches, turns = [], [], []
     match_id, turn_id = 1, 1
@@ -76,26 +147,231 @@ def generate_dataset(outdir=None, seed: int = 42):
 
         match_id += 1
 
-    # -------------------------
-    # 3. Write CSVs
-    # -------------------------
-    csv_data = {
-        "players.csv": (["player_id", "arrival_time", "auth_latency", "match_id"], players),
-        "matches.csv": (["match_id", "p1", "p2", "start_time", "duration", "turns", "dropout"], matches),
-        "turns.csv": (["turn_id", "match_id", "turn_index", "start_time", "duration", "pubsub_delay"], turns)
-    }
-
-    for fname, (header, rows) in csv_data.items():
-        with open(outdir / fname, "w", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow(header)
-            writer.writerows(rows)
+    return players, matches, turns
+
+
+def generate_blocks(streams, num_players, chunk_players=DEFAULT_CHUNK_PLAYERS,
+                    first_player_id=0, first_match_id=1, first_turn_id=1, clock=0.0, curve=None):
+    """
+    Yield (players, matches, turns) blocks of at most chunk_players players
+    (rounded down to whole matches), with ids and arrival times continuing
+    across blocks from the given offsets. Memory is bounded by one block.
+    curve: time-varying arrival rate (data_gen.arrivals.arrival_rate_curve),
+    None for the constant-rate Poisson process.
+    """
+    chunk_players = max(2, chunk_players - chunk_players % 2)
+    num_players -= num_players % 2  # players are paired; an odd one out is dropped
+    end_player = first_player_id + num_players
+    player_id, match_id, turn_id = first_player_id, first_match_id, first_turn_id
+    take_arrivals = arrival_times(streams.arrival, curve, start=clock)
+    while player_id < end_player:
+        n = min(chunk_players, end_player - player_id)
+        arrivals = take_arrivals(n)
+        players, matches, turns = build_tables(streams, arrivals, player_id, match_id, turn_id)
+        yield players, matches, turns
+        player_id += n
+        match_id += len(matches)
+        turn_id += len(turns)
+
+
+def write_blocks(outdir, blocks, fmt="csv", header=True):
+    """
+    Stream (players, matches, turns) blocks into players/matches/turns.<fmt>.
+    Returns the row count per table.
+    """
+    with TableWriter(outdir, "players", fmt, header, PLAYER_COLUMNS) as pw, \
+            TableWriter(outdir, "matches", fmt, header, MATCH_COLUMNS) as mw, \
+            TableWriter(outdir, "turns", fmt, header, TURN_COLUMNS) as tw:
+        for players, matches, turns in blocks:
+            pw.write(players)
+            mw.write(matches)
+            tw.write(turns)
+    return {"players": pw.rows, "matches": mw.rows, "turns": tw.rows}
+
+
+# -------------------------
+# Parallel generation: one shard of the arrival timeline per worker
+# -------------------------
+def _shard_sizes(num_players, shards):
+    """Split the (even) player count into shards of whole matches."""
+    matches = num_players // 2
+    base, extra = divmod(matches, shards)
+    return [2 * (base + (k < extra)) for k in range(shards)]
+
+
+def _shard_extent(seed_seq, num_players, chunk_players, curve=None, start=0.0):
+    """
+    Time span and turn count of a shard starting at `start`, from its
+    arrival and duration streams alone (the other streams are not touched).
+    """
+    streams = DataStreams(seed_seq)
+    take_arrivals = arrival_times(streams.arrival, curve, start=start)
+    end, turns, left = start, 0, num_players
+    chunk_players = max(2, chunk_players - chunk_players % 2)
+    while left:
+        n = min(chunk_players, left)
+        end = take_arrivals(n)[-1]
+        durations = np.maximum(streams.duration.normal(CONFIG["match_duration_mean"], CONFIG["match_duration_std"], n // 2), 60)
+        turns += int(estimate_turn_counts(durations).sum())
+        left -= n
+    return end - start, turns
+
+
+def _write_shard(outdir, seed_seq, num_players, chunk_players, offsets, fmt, header, curve=None):
+    blocks = generate_blocks(DataStreams(seed_seq), num_players, chunk_players, *offsets, curve=curve)
+    return write_blocks(outdir, blocks, fmt, header=header)
+
+
+def _concat_shards(shard_dirs, outdir, fmt, counts):
+    for name in ("players", "matches", "turns"):
+        target = Path(outdir) / f"{name}.{fmt}"
+        parts = [Path(d) / f"{name}.{fmt}" for d in shard_dirs]
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+
+            # empty shards hold a schema of null columns, which would not match the others;
+            # the first one is kept only if every shard is empty
+            parts = [p for p, c in zip(parts, counts) if c[name]] or parts[:1]
+            writer = None
+            for part in parts:
+                table = pq.read_table(part)
+                writer = writer or pq.ParquetWriter(target, table.schema)
+                writer.write_table(table)
+            if writer:
+                writer.close()
+        else:
+            # only the first shard has a header; gzip members concatenate into one valid stream
+            with open(target, "wb") as out:
+                for part in parts:
+                    with open(part, "rb") as f:
+                        shutil.copyfileobj(f, out, 1 << 20)
+
+
+def generate_parallel(outdir, seed, num_players, workers, chunk_players=DEFAULT_CHUNK_PLAYERS, fmt="csv", curve=None):
+    """
+    Generate the dataset in `workers` processes. The arrival timeline is cut
+    into contiguous shards of players, each with its own SeedSequence.spawn
+    stream. A cheap first pass computes every shard's time span and turn
+    count, so each shard starts at the right clock and player/match/turn
+    ids; the shard files are then concatenated in order.
+    With a time-varying curve a shard's arrivals depend on its start time,
+    so the first pass runs shard after shard in this process instead.
+    Deterministic for a given (seed, workers).
+    """
+    num_players -= num_players % 2
+    sizes = _shard_sizes(num_players, workers)
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+
+    shard_root = Path(outdir) / ".shards"
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            if curve is None:
+                extents = list(pool.map(_shard_extent, seeds, sizes, [chunk_players] * workers))
+            else:
+                extents, start = [], 0.0
+                for seed_seq, size in zip(seeds, sizes):
+                    extents.append(_shard_extent(seed_seq, size, chunk_players, curve, start))
+                    start += extents[-1][0]
+
+            offsets, player_id, match_id, turn_id, clock = [], 0, 1, 1, 0.0
+            for size, (span, turns) in zip(sizes, extents):
+                offsets.append((player_id, match_id, turn_id, clock))
+                player_id += size
+                match_id += size // 2
+                turn_id += turns
+                clock += span
+
+            shard_dirs = [shard_root / f"shard_{k:03d}" for k in range(workers)]
+            for d in shard_dirs:
+                d.mkdir(parents=True, exist_ok=True)
+            counts = list(pool.map(
+                _write_shard, shard_dirs, seeds, sizes, [chunk_players] * workers, offsets,
+                [fmt] * workers, [k == 0 or fmt == "parquet" for k in range(workers)], [curve] * workers
+            ))
+
+        _concat_shards(shard_dirs, outdir, fmt, counts)
+    finally:
+        shutil.rmtree(shard_root, ignore_errors=True)
+    return {name: sum(c[name] for c in counts) for name in ("players", "matches", "turns")}
+
+
+def generate_dataset(outdir=None, seed: int = 42, vectorized: bool = True,
+                     chunk_players: int = DEFAULT_CHUNK_PLAYERS, fmt: str = "csv", workers: int = 1):
+    """
+    Generate synthetic dataset for the turn-based multiplayer simulation.
+    Produces players.csv, matches.csv, and turns.csv.
+    vectorized=True draws everything as NumPy arrays (DataStreams seeded
+    with seed) and writes blocks of chunk_players players as they are
+    generated, so peak memory does not grow with CONFIG["num_players"];
+    fmt may also be "csv.gz" or "parquet". The output does not depend on
+    chunk_players (turn start times up to floating-point rounding).
+    workers > 1 generates shards in parallel (see generate_parallel).
+    CONFIG["arrival_model"] / burst_* select a time-varying arrival rate.
+    vectorized=False runs the original per-match loop (constant rate only).
+    Both are reproducible for a given seed and write the same CSV schemas.
+    """
+
+    # Default output folder: data/output/ under project root
+    if outdir is None:
+        outdir = Path(__file__).parent.parent / "data" / "output"
+    else:
+        outdir = Path(outdir)
+
+    outdir.mkdir(parents=True, exist_ok=True)
+
+    curve = arrival_rate_curve()
+    if curve is not None and not vectorized:
+        raise ValueError("The per-match loop only supports constant-rate arrivals")
+
+    if vectorized and workers > 1:
+        rows = generate_parallel(outdir, seed, CONFIG["num_players"], workers, chunk_players, fmt, curve)
+    elif vectorized:
+        blocks = generate_blocks(DataStreams(seed), CONFIG["num_players"], chunk_players, curve=curve)
+        rows = write_blocks(outdir, blocks, fmt)
+    else:
+        np.random.seed(seed)  # Reproducibility
+        players, matches, turns = _generate_rows_loop(generate_arrival_times())
+        csv_data = {
+            "players.csv": (PLAYER_COLUMNS, players),
+            "matches.csv": (MATCH_COLUMNS, matches),
+            "turns.csv": (TURN_COLUMNS, turns)
+        }
+        for fname, (header, rows) in csv_data.items():
+            with open(outdir / fname, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(header)
+                writer.writerows(rows)
+        rows = {"players": len(players), "matches": len(matches), "turns": len(turns)}
+        fmt = "csv"
 
     print(f"[OK] Dataset generated in: {outdir.resolve()}")
-    print(f" - players.csv ({len(players)} rows)")
-    print(f" - matches.csv ({len(matches)} rows)")
-    print(f" - turns.csv   ({len(turns)} rows)")
+    print(f" - players.{fmt} ({rows['players']} rows)")
+    print(f" - matches.{fmt} ({rows['matches']} rows)")
+    print(f" - turns.{fmt}   ({rows['turns']} rows)")
 
 
 if __name__ == "__main__":
-    generate_dataset()
+    parser = argparse.ArgumentParser(description="Generate the synthetic players/matches/turns dataset")
+    parser.add_argument("--out", default=None, help="Output folder (default: data/output)")
+    parser.add_argument("--seed", type=int, default=CONFIG["seed"])
+    parser.add_argument("--players", type=int, default=None, help="Number of players (default: CONFIG['num_players'])")
+    parser.add_argument("--loop", action="store_true", help="Use the original per-match loop instead of the vectorized path")
+    parser.add_argument("--chunk", type=int, default=DEFAULT_CHUNK_PLAYERS, help="Players generated and written per block")
+    parser.add_argument("--format", default="csv", choices=FORMATS, help="Output format (parquet needs pyarrow)")
+    parser.add_argument("--workers", type=int, default=1, help="Generate shards in this many processes")
+    parser.add_argument("--arrival-model", default=None, choices=ARRIVAL_MODELS,
+                        help="Arrival rate model (default: CONFIG['arrival_model'])")
+    parser.add_argument("--rate-csv", default=None, help="Empirical rate curve CSV (time, rate columns; implies --arrival-model empirical)")
+    parser.add_argument("--burst", nargs=3, type=float, default=None, metavar=("START", "DURATION", "MULTIPLIER"),
+                        help="Add a burst of MULTIPLIER x the rate for DURATION seconds from START")
+    args = parser.parse_args()
+    if args.players is not None:
+        CONFIG["num_players"] = args.players
+    if args.rate_csv:
+        CONFIG["arrival_model"], CONFIG["arrival_rate_csv"] = "empirical", args.rate_csv
+    if args.arrival_model:
+        CONFIG["arrival_model"] = args.arrival_model
+    if args.burst:
+        CONFIG["burst_start"], CONFIG["burst_duration"], CONFIG["burst_multiplier"] = args.burst
+    generate_dataset(args.out, seed=args.seed, vectorized=not args.loop, chunk_players=args.chunk, fmt=args.format,
+                     workers=args.workers)
@@ -1,9 +1,15 @@
 # data_gen/latency.py
 from .config import CONFIG
-from .distributions import clipped_normal
+from .distributions import clipped_normal, clipped_normal_array
 
 def sample_auth_latency():
     return clipped_normal(CONFIG["auth_delay_mean"], CONFIG["auth_delay_std"], min_val=10)
 
 def sample_pubsub_latency():
     return clipped_normal(CONFIG["pubsub_delay_mean"], CONFIG["pubsub_delay_std"], min_val=5)
+
+def sample_auth_latencies(rng, n):
+    return clipped_normal_array(rng, CONFIG["auth_delay_mean"], CONFIG["auth_delay_std"], n, min_val=10)
+
+def sample_pubsub_latencies(rng, n):
+    return clipped_normal_array(rng, CONFIG["pubsub_delay_mean"], CONFIG["pubsub_delay_std"], n, min_val=5)
@@ -1,7 +1,7 @@
 # data_gen/turns.py
 import numpy as np
 from .config import CONFIG
-from .distributions import clipped_normal
+from .distributions import clipped_normal, clipped_normal_array
 
 def generate_turn_durations(num_turns):
     """Return a list of turn durations for a match."""
@@ -14,3 +14,11 @@ def estimate_turn_count(match_duration):
     """Convert continuous match time to discrete turns."""
     avg_turn = CONFIG["turn_mean"]
     return max(1, int(match_duration / avg_turn))
+
+def generate_turn_durations_array(rng, num_turns):
+    """Vectorized generate_turn_durations: one array for all turns."""
+    return clipped_normal_array(rng, CONFIG["turn_mean"], CONFIG["turn_std"], num_turns, min_val=0.1)
+
+def estimate_turn_counts(match_durations):
+    """Vectorized estimate_turn_count."""
+    return np.maximum(1, (match_durations / CONFIG["turn_mean"]).astype(np.int64))
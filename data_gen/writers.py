@@ -0,0 +1,61 @@
+# data_gen/writers.py
+import gzip
+from pathlib import Path
+
+import pandas as pd
+
+FORMATS = ("csv", "csv.gz", "parquet")
+
+
+class TableWriter:
+    """
+    Append-only writer for one dataset table, fed one DataFrame block at a
+    time so only the current block is ever held in memory.
+    fmt: "csv", "csv.gz" (gzip-compressed CSV) or "parquet" (columnar,
+    one row group per block; needs pyarrow).
+    header=False omits the CSV header (for shards appended to another file).
+    columns: written as a header-only file (or empty parquet schema) if
+    no block arrives, so an empty dataset still has every table.
+    """
+
+    def __init__(self, outdir, name, fmt="csv", header=True, columns=None):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown dataset format: {fmt} (expected one of {FORMATS})")
+        self.path = Path(outdir) / f"{name}.{fmt}"
+        self.fmt = fmt
+        self.header = header
+        self.columns = list(columns or [])
+        self.rows = 0
+        self._file = None
+        self._parquet = None
+
+    def write(self, df):
+        if self.fmt == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table)
+        else:
+            first = self._file is None
+            if first:
+                opener = gzip.open if self.fmt == "csv.gz" else open
+                self._file = opener(self.path, "wt", newline="")
+            df.to_csv(self._file, header=first and self.header, index=False)
+        self.rows += len(df)
+
+    def close(self):
+        if self._file is None and self._parquet is None:
+            self.write(pd.DataFrame(columns=self.columns))
+        if self._parquet is not None:
+            self._parquet.close()
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,244 @@
+# experiments/compare.py
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Fix import resolution when run as a script
+sys.path.append(str(Path(__file__).parent.parent.resolve()))
+
+from config import METRICS_SKETCHES
+from experiments.replications import confidence_table
+from utils.metrics import load_metrics, summarize_metrics
+from utils.sketches import load_sketches
+
+SUMMARY_CACHE = "run_summary.json"
+CURVE_QUANTILES = np.round(np.linspace(0.01, 0.99, 99), 2)  # per-run quantile curve kept in the cache
+
+
+# ---------------------------------------------------------
+# Per-run summaries (cached next to each run)
+# ---------------------------------------------------------
+def _source_files(run_path):
+    files = [os.path.join(run_path, f) for f in ("metrics.csv", "scenario.json", "sketches.json")]
+    files += glob.glob(os.path.join(run_path, "metrics_parts", "part-*.csv"))
+    return sorted(f for f in files if os.path.exists(f))
+
+
+def run_signature(run_path):
+    """
+    Hash of the name, size and mtime of every file a run summary depends on.
+    """
+    h = hashlib.sha1()
+    for f in _source_files(run_path):
+        st = os.stat(f)
+        h.update(f"{os.path.basename(f)}:{st.st_size}:{st.st_mtime_ns};".encode())
+    return h.hexdigest()
+
+
+def _scenario_params(run_path):
+    path = os.path.join(run_path, "scenario.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        params = json.load(f)
+    # lists (tuple fields) become strings so runs can be grouped on them
+    return {k: ",".join(map(str, v)) if isinstance(v, list) else v for k, v in params.items()}
+
+
+def summarize_run(run_path, curve_metrics=METRICS_SKETCHES):
+    """
+    Scenario parameters, per-metric count/mean/p95 and quantile curves of
+    curve_metrics for one run folder.
+    """
+    df = load_metrics(run_path)
+    curves = {}
+    if not df.empty:
+        values = pd.to_numeric(df["value"], errors="coerce")
+        for metric in curve_metrics:
+            v = values[df["metric"] == metric].dropna()
+            if len(v):
+                curves[metric] = v.quantile(CURVE_QUANTILES).tolist()
+    # metrics kept only as sketches (METRICS_DROP_RAW)
+    for metric, sketch in load_sketches(run_path).items():
+        if metric in curve_metrics and metric not in curves and sketch.count:
+            curves[metric] = [sketch.quantile(q) for q in CURVE_QUANTILES]
+    return {
+        "params": _scenario_params(run_path),
+        "summary": summarize_metrics(df),
+        "curves": curves,
+    }
+
+
+def _summarize_and_cache(run_path, signature):
+    entry = summarize_run(run_path)
+    tmp = os.path.join(run_path, SUMMARY_CACHE + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump({"signature": signature, **entry}, f)
+    os.replace(tmp, os.path.join(run_path, SUMMARY_CACHE))
+    return entry
+
+
+def _cached_summary(run_path, signature):
+    path = os.path.join(run_path, SUMMARY_CACHE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        cached = json.load(f)
+    return cached if cached.get("signature") == signature else None
+
+
+def collect_runs(run_paths, workers=None):
+    """
+    Summaries of many run folders: cached ones are read from their
+    run_summary.json, the rest are summarized in a process pool.
+    Returns {run_path: {"params", "summary", "curves"}}.
+    """
+    entries, todo = {}, {}
+    for run_path in run_paths:
+        signature = run_signature(run_path)
+        cached = _cached_summary(run_path, signature)
+        if cached is None:
+            todo[run_path] = signature
+        else:
+            entries[run_path] = cached
+
+    if todo:
+        workers = min(workers or os.cpu_count() or 1, len(todo))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_summarize_and_cache, p, s): p for p, s in todo.items()}
+            for fut in as_completed(futures):
+                entries[futures[fut]] = fut.result()
+    print(f"[INFO] {len(run_paths)} runs: {len(run_paths) - len(todo)} cached, {len(todo)} summarized")
+    return {p: entries[p] for p in run_paths}
+
+
+# ---------------------------------------------------------
+# Cross-run tables
+# ---------------------------------------------------------
+def runs_table(entries):
+    """
+    One row per run: run folder, scenario parameters, metric summary.
+    """
+    rows = [{"run": p, **e["params"], **e["summary"]} for p, e in entries.items()]
+    return pd.DataFrame(rows)
+
+
+def varying_params(entries):
+    """
+    Scenario parameters whose value differs between runs (random_seed
+    excluded), i.e. the columns the runs are aligned on.
+    """
+    keys = sorted({k for e in entries.values() for k in e["params"]} - {"random_seed"})
+    return [k for k in keys if len({json.dumps(e["params"].get(k)) for e in entries.values()}) > 1]
+
+
+def compare_table(runs_df, group_by, level=0.95):
+    """
+    Treat the runs of each scenario group as replications: mean / CI of
+    every summary column per group.
+    """
+    summary_cols = [c for c in runs_df.columns if c.endswith(("_count", "_mean", "_95p"))]
+    if not group_by:
+        return confidence_table(runs_df[summary_cols], level=level)
+    tables = []
+    for key, group in runs_df.groupby(group_by, dropna=False, sort=True):
+        key = key if isinstance(key, tuple) else (key,)
+        table = confidence_table(group[summary_cols], level=level)
+        for col, val in reversed(list(zip(group_by, key))):
+            table.insert(0, col, val)
+        tables.append(table)
+    return pd.concat(tables, ignore_index=True) if tables else pd.DataFrame()
+
+
+# ---------------------------------------------------------
+# Overlaid plots
+# ---------------------------------------------------------
+def plot_overlaid_curves(entries, group_by, outdir):
+    """
+    One figure per curve metric: the quantile curve (empirical CDF) of
+    every scenario group, averaged over its runs, overlaid on one axes.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    groups = {}
+    for e in entries.values():
+        label = ", ".join(f"{k}={e['params'].get(k)}" for k in group_by) or "all runs"
+        groups.setdefault(label, []).append(e["curves"])
+
+    metrics = sorted({m for curves in groups.values() for c in curves for m in c})
+    for metric in metrics:
+        plt.figure(figsize=(9, 5))
+        for label, curves in groups.items():
+            qs = [c[metric] for c in curves if metric in c]
+            if qs:
+                plt.plot(np.mean(qs, axis=0), CURVE_QUANTILES, label=f"{label} (n={len(qs)})")
+        plt.title(f"{metric} CDF by scenario")
+        plt.xlabel("Value")
+        plt.ylabel("Quantile")
+        plt.legend(fontsize="small")
+        plt.tight_layout()
+        path = os.path.join(outdir, f"compare_{metric}.png")
+        plt.savefig(path)
+        plt.close()
+        print(f"[OK] Saved: {path}")
+
+
+def compare_runs(run_paths, outdir, group_by=None, level=0.95, workers=None, plots=True):
+    """
+    Summarize run_paths (in parallel, reusing per-run caches), align them
+    by scenario parameters and write cross_runs.csv (one row per run),
+    cross_run_summary.csv (mean / CI per group and metric) and overlaid
+    CDF plots into outdir. Returns (runs_df, summary_df).
+    """
+    if not run_paths:
+        raise Exception("No run folders to compare")
+    os.makedirs(outdir, exist_ok=True)
+    entries = collect_runs(run_paths, workers=workers)
+    if group_by is None:
+        group_by = varying_params(entries)
+
+    runs_df = runs_table(entries)
+    summary_df = compare_table(runs_df, group_by, level=level)
+
+    runs_csv = os.path.join(outdir, "cross_runs.csv")
+    summary_csv = os.path.join(outdir, "cross_run_summary.csv")
+    runs_df.to_csv(runs_csv, index=False)
+    summary_df.to_csv(summary_csv, index=False)
+    print(f"[OK] Saved per-run table: {runs_csv}")
+    print(f"[OK] Saved cross-run summary (grouped by {group_by or 'nothing'}): {summary_csv}")
+
+    if plots:
+        plot_overlaid_curves(entries, group_by, outdir)
+    return runs_df, summary_df
+
+
+# ---------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Compare and aggregate many simulation runs")
+    parser.add_argument("runs", nargs="*", default=["outputs/run_*"], help="Run folders or glob patterns (default: outputs/run_*)")
+    parser.add_argument("--group-by", default=None, help="Comma-separated scenario parameters (default: those that vary)")
+    parser.add_argument("--level", type=float, default=0.95, help="Confidence level for the CI table")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--out", default="outputs/compare", help="Output folder")
+    parser.add_argument("--no-plots", action="store_true", help="Only write the tables")
+    args = parser.parse_args()
+
+    run_paths = sorted({p for pattern in args.runs for p in glob.glob(pattern) if os.path.isdir(p)})
+    group_by = args.group_by.split(",") if args.group_by else None
+    compare_runs(run_paths, args.out, group_by=group_by, level=args.level, workers=args.workers, plots=not args.no_plots)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+# experiments/replications.py
+import argparse
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+# Fix import resolution when run as a script
+sys.path.append(str(Path(__file__).parent.parent.resolve()))
+
+from config import RANDOM_SEED
+from utils import logger
+from utils.metrics import load_metrics, summarize_metrics
+from utils.sketches import load_sketches, merge_sketches, save_sketches
+
+# Two-sided 95% Student-t critical values for small sample sizes (df = n - 1)
+_T95 = {
+    1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365,
+    8: 2.306, 9: 2.262, 10: 2.228, 11: 2.201, 12: 2.179, 13: 2.160, 14: 2.145,
+    15: 2.131, 16: 2.120, 17: 2.110, 18: 2.101, 19: 2.093, 20: 2.086, 21: 2.080,
+    22: 2.074, 23: 2.069, 24: 2.064, 25: 2.060, 26: 2.056, 27: 2.052, 28: 2.048,
+    29: 2.045, 30: 2.042,
+}
+
+
+# ---------------------------------------------------------
+# Seeds
+# ---------------------------------------------------------
+def replication_seeds(n, base_seed=RANDOM_SEED):
+    """
+    Derive n statistically independent integer seeds from one base seed.
+    """
+    children = np.random.SeedSequence(base_seed).spawn(n)
+    return [int(c.generate_state(1)[0]) for c in children]
+
+
+# ---------------------------------------------------------
+# Confidence intervals
+# ---------------------------------------------------------
+def _critical_value(n, level):
+    if level == 0.95 and n - 1 in _T95:
+        return _T95[n - 1]
+    return NormalDist().inv_cdf(0.5 + level / 2)
+
+
+def confidence_table(rep_df, level=0.95):
+    """
+    Collapse a per-replication table (one row per replication) into
+    metric / n / mean / std / ci_low / ci_high rows.
+    """
+    rows = []
+    for col in rep_df.columns:
+        if col in ("replication", "seed", "out_dir"):
+            continue
+        v = pd.to_numeric(rep_df[col], errors="coerce").dropna()
+        n = len(v)
+        if n == 0:
+            continue
+        mean = float(v.mean())
+        std = float(v.std(ddof=1)) if n > 1 else 0.0
+        half = _critical_value(n, level) * std / math.sqrt(n) if n > 1 else 0.0
+        rows.append({
+            "metric": col,
+            "n": n,
+            "mean": mean,
+            "std": std,
+            "ci_low": mean - half,
+            "ci_high": mean + half,
+        })
+    return pd.DataFrame(rows)
+
+
+# ---------------------------------------------------------
+# Worker
+# ---------------------------------------------------------
+def _run_replication(rep, seed, out_dir, scenario=None):
+    # Imported lazily so the pool workers pay the simulation import cost once
+    from sim_runner import run_once
+
+    run_once(out_dir, seed=seed, scenario=scenario)
+    summary = summarize_metrics(load_metrics(out_dir))
+    return {"replication": rep, "seed": seed, "out_dir": out_dir, **summary}
+
+
+# ---------------------------------------------------------
+# Engine
+# ---------------------------------------------------------
+def run_replications(n_reps, out_root, base_seed=RANDOM_SEED, workers=None, level=0.95, scenario=None, log_level="OFF"):
+    """
+    Run n_reps independent replications of sim_runner.run_once (optionally
+    for a given config.Scenario) across a process pool. Each replication writes into its own out_root/rep_XXX folder.
+    Writes replications.csv (one row per replication) and
+    replication_summary.csv (mean / CI per metric) into out_root, plus the
+    replications' quantile sketches merged into quantiles.csv / sketches.json.
+    Workers log at log_level (default OFF: headless, no per-event output).
+    Returns (rep_df, summary_df).
+    """
+    os.makedirs(out_root, exist_ok=True)
+    seeds = replication_seeds(n_reps, base_seed)
+    workers = workers or os.cpu_count() or 1
+
+    rows = []
+    with ProcessPoolExecutor(max_workers=min(workers, n_reps), initializer=logger.configure, initargs=(log_level,)) as pool:
+        futures = [
+            pool.submit(_run_replication, rep, seed, os.path.join(out_root, f"rep_{rep:03d}"), scenario)
+            for rep, seed in enumerate(seeds)
+        ]
+        for fut in as_completed(futures):
+            rows.append(fut.result())
+
+    rep_df = pd.DataFrame(rows).sort_values("replication").reset_index(drop=True)
+    summary_df = confidence_table(rep_df, level=level)
+
+    merged = merge_sketches(load_sketches(d) for d in rep_df["out_dir"])
+    if merged:
+        save_sketches(merged, out_root)
+
+    rep_csv = os.path.join(out_root, "replications.csv")
+    summary_csv = os.path.join(out_root, "replication_summary.csv")
+    rep_df.to_csv(rep_csv, index=False)
+    summary_df.to_csv(summary_csv, index=False)
+    print(f"[OK] Saved per-replication table: {rep_csv}")
+    print(f"[OK] Saved replication summary: {summary_csv}")
+    return rep_df, summary_df
+
+
+# ---------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Run independent replications of the simulation in parallel")
+    parser.add_argument("--reps", type=int, default=30, help="Number of replications")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=RANDOM_SEED, help="Base seed the replication seeds are spawned from")
+    parser.add_argument("--level", type=float, default=0.95, help="Confidence level for the CI table")
+    parser.add_argument("--out", default=None, help="Output folder (default: outputs/replications_<ts>)")
+    parser.add_argument("--log-level", default="OFF", help="Log level inside the workers (default: OFF)")
+    args = parser.parse_args()
+
+    out_root = args.out
+    if not out_root:
+        ts = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+        out_root = os.path.join("outputs", f"replications_{ts}")
+
+    run_replications(args.reps, out_root, base_seed=args.seed, workers=args.workers, level=args.level, log_level=args.log_level)
+
+
+if __name__ == "__main__":
+    main()
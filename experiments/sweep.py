@@ -0,0 +1,132 @@
+# experiments/sweep.py
+import argparse
+import itertools
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import yaml
+
+# Fix import resolution when run as a script
+sys.path.append(str(Path(__file__).parent.parent.resolve()))
+
+from config import Scenario, RANDOM_SEED
+from experiments.replications import replication_seeds, _run_replication
+from utils import logger
+
+
+# ---------------------------------------------------------
+# Designs
+# ---------------------------------------------------------
+def grid_design(space):
+    """
+    Full factorial design.
+    space: {param: [value, value, ...]} -> list of {param: value} points.
+    """
+    names = list(space)
+    return [dict(zip(names, combo)) for combo in itertools.product(*(space[n] for n in names))]
+
+
+def latin_hypercube_design(bounds, n, seed=RANDOM_SEED):
+    """
+    Latin-hypercube design with n points.
+    bounds: {param: (low, high)}. Every parameter range is cut into n strata
+    and each stratum is sampled exactly once.
+    """
+    rng = np.random.default_rng(seed)
+    points = [{} for _ in range(n)]
+    for name, (low, high) in bounds.items():
+        strata = (rng.permutation(n) + rng.random(n)) / n
+        for point, u in zip(points, strata):
+            point[name] = float(low + u * (high - low))
+    return points
+
+
+def load_design(spec_path):
+    """
+    Build the list of design points from a YAML/JSON sweep spec:
+
+        design: grid            # or: lhs
+        samples: 200            # lhs only
+        seed: 42                # lhs only
+        parameters:
+          player_arrival_rate: [0.1, 0.2, 0.5]   # grid: values, lhs: [low, high]
+    """
+    with open(spec_path) as f:
+        spec = yaml.safe_load(f)
+
+    design = spec.get("design", "grid")
+    params = spec.get("parameters", {})
+    if design == "grid":
+        return grid_design(params)
+    if design == "lhs":
+        return latin_hypercube_design(params, int(spec["samples"]), seed=spec.get("seed", RANDOM_SEED))
+    raise ValueError(f"Unknown sweep design: {design}")
+
+
+# ---------------------------------------------------------
+# Driver
+# ---------------------------------------------------------
+def run_sweep(points, out_root, base=None, reps=1, workers=None, base_seed=RANDOM_SEED, log_level="OFF"):
+    """
+    Run every design point (reps replications each) in one shared process
+    pool, so workers import the simulation once and then stay warm.
+    Writes one consolidated sweep_results.csv (scenario parameters +
+    per-metric summary per row) into out_root and returns it as a DataFrame.
+    Workers log at log_level (default OFF).
+    """
+    base = base or Scenario()
+    scenarios = [base.replace(**p) for p in points]  # validate before spawning workers
+    os.makedirs(out_root, exist_ok=True)
+    seeds = replication_seeds(reps, base_seed)
+    workers = workers or os.cpu_count() or 1
+
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=logger.configure, initargs=(log_level,)) as pool:
+        futures = {}
+        for idx, scenario in enumerate(scenarios):
+            for rep, seed in enumerate(seeds):
+                out_dir = os.path.join(out_root, f"point_{idx:04d}", f"rep_{rep:03d}")
+                fut = pool.submit(_run_replication, rep, seed, out_dir, scenario)
+                futures[fut] = (idx, scenario)
+        for fut in as_completed(futures):
+            idx, scenario = futures[fut]
+            params = scenario.to_dict()
+            params.pop("random_seed")  # superseded by the per-replication seed column
+            rows.append({"point": idx, **params, **fut.result()})
+
+    results = pd.DataFrame(rows).sort_values(["point", "replication"]).reset_index(drop=True)
+    results_csv = os.path.join(out_root, "sweep_results.csv")
+    results.to_csv(results_csv, index=False)
+    print(f"[OK] Saved sweep results ({len(points)} points x {reps} reps): {results_csv}")
+    return results
+
+
+# ---------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Run a scenario parameter sweep in parallel")
+    parser.add_argument("spec", help="YAML/JSON sweep spec (see load_design)")
+    parser.add_argument("--reps", type=int, default=1, help="Replications per design point")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=RANDOM_SEED, help="Base seed for the replication seeds")
+    parser.add_argument("--out", default=None, help="Output folder (default: outputs/sweep_<ts>)")
+    parser.add_argument("--log-level", default="OFF", help="Log level inside the workers (default: OFF)")
+    args = parser.parse_args()
+
+    out_root = args.out
+    if not out_root:
+        ts = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+        out_root = os.path.join("outputs", f"sweep_{ts}")
+
+    points = load_design(args.spec)
+    run_sweep(points, out_root, reps=args.reps, workers=args.workers, base_seed=args.seed, log_level=args.log_level)
+
+
+if __name__ == "__main__":
+    main()
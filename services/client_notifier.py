@@ -0,0 +1,30 @@
+# services/client_notifier.py
+import simpy
+
+
+class ClientNotifier:
+    """
+    Stand-in for the players' game clients.
+    Subscribes to "turn_completed" and consumes the notifications, so
+    PubSub delivers them and records pubsub_delivered / pubsub_delay for
+    each turn (during trace replay, with the recorded delays).
+    """
+
+    def __init__(self, env, name, broker):
+        self.env = env
+        self.name = name
+        self.broker = broker
+        self.inbox = simpy.Store(env)
+        self.delivered = 0
+
+        self.broker.subscribe("turn_completed", self)
+
+        self.env.process(self._run())
+
+    def __repr__(self):
+        return "<ClientNotifier>"
+
+    def _run(self):
+        while True:
+            yield self.inbox.get()
+            self.delivered += 1
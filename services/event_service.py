@@ -1,5 +1,6 @@
 # services/event_service.py
 import simpy
+from utils.records import Message
 
 class EventService:
     """
@@ -34,12 +35,14 @@ class EventService:
         while True:
             msg, src, ts_sent, net_delay = yield self.inbox.get()
 
-            if not isinstance(msg, dict):
+            if not isinstance(msg, Message):
                 self._log(f"ERROR: Received malformed message from {src}: {msg}")
                 continue
 
-            mtype = msg.get("type")
-            payload = msg.get("payload", {})
+            mtype, payload = msg
+            if hasattr(payload, "_asdict"):  # Match / TurnCompleted records
+                payload = payload._asdict()
+            payload = payload or {}
 
             self._log(f"RECV from={src} type={mtype} payload={payload} delay={net_delay:.3f}")
 
@@ -1,23 +1,39 @@
 import simpy
-import random
-from typing import Any, List
-from config import AVG_TURNS_PER_MATCH, AVG_TIME_PER_TURN, TURN_TIME_STD
+from config import Scenario
+from utils import logger
+from utils.metrics import BusyCounter
+from utils.records import DEFAULT_SKILL, Match, Message, Player, TurnCompleted
+from utils.variates import VariateBank
 
 class GameLogicService:
     """
     Game logic service node.
     Subscribes to "match_created".
     Simulates turn processing and publishes "turn_completed".
+    Matches run concurrently, each holding one slot of a bounded
+    game-server pool for its whole duration.
+    With a trace (utils.trace.MatchTrace), a match whose players appear in
+    it replays the recorded turn durations and turn_completed pubsub
+    delays; other matches are sampled as usual. A trace dropout is
+    metric-only: the match still plays every recorded turn (the trace
+    lists the turns actually played) and records match_dropout.
     """
 
-    def __init__(self, env, name, storage, network, broker, metrics):
+    def __init__(self, env, name, storage, network, broker, metrics, scenario=None, variates=None, trace=None):
         self.env = env
         self.name = name
         self.storage = storage
         self.network = network
         self.broker = broker
         self.metrics = metrics
+        self.scenario = scenario or Scenario()
+        self.rng = (variates or VariateBank(self.scenario.random_seed)).stream("game_logic")
         self.inbox = simpy.Store(env)
+        self.trace = trace
+
+        # game-server fleet: one slot per concurrently running match
+        self.servers = simpy.Resource(env, capacity=self.scenario.game_server_slots)
+        self.slots = BusyCounter(env, self.servers.capacity)
 
         # subscribe to match_created
         self.broker.subscribe("match_created", self)
@@ -28,14 +44,15 @@ class GameLogicService:
     # Helper to create turn_completed message
     # -------------------------------------------------------------
     def _make_turn_message(self, match_id, turn, by, ts):
-        return {"type": "turn_completed", "payload": {"match_id": match_id, "turn": turn, "by": by, "ts": ts}}
+        return Message("turn_completed", TurnCompleted(match_id, turn, by, ts))
 
     # -------------------------------------------------------------
     # Logging (unified with other services)
     # -------------------------------------------------------------
+    # Call sites check logger.enabled(..., "gamelogic") before formatting msg.
     def _log(self, msg: str):
-        s = f"{self.env.now:.3f}: [GAMELOGIC] {msg}"
-        print(s)
+        if logger.console_enabled():
+            print(f"{self.env.now:.3f}: [GAMELOGIC] {msg}")
         # Structured metrics event with timestamp
         self.metrics.log_event(
             event_type="game_logic_log",
@@ -49,45 +66,95 @@ class GameLogicService:
     def notify(self, topic, msg, src):
         return self.inbox.put((msg, src))
 
+    # -------------------------------------------------------------
+    # Game-server slot accounting
+    # -------------------------------------------------------------
+    def slot_utilization(self) -> float:
+        """
+        Time-weighted fraction of game-server slots in use since the start.
+        """
+        return self.slots.utilization()
+
+    def _record_slots(self):
+        self.metrics.record("game_server_slots_busy", self.slots.busy, timestamp=self.env.now)
+        self.metrics.record("game_server_utilization", self.slot_utilization(), timestamp=self.env.now)
+
     # -------------------------------------------------------------
     # Main message loop
     # -------------------------------------------------------------
     def _run(self):
         while True:
             msg, src = yield self.inbox.get()
-            mtype = msg.get("type")
+            mtype, payload = msg
 
             if mtype == "match_created":
-                yield self.env.process(self._handle_match(msg["payload"]))
+                # matches run concurrently, bounded by the game-server pool
+                self.env.process(self._handle_match(payload))
             elif mtype == "turn_submitted":
                 # if you handle external turn submissions
-                yield self.env.process(self._handle_turn_submission(msg["payload"]))
-            else:
+                yield self.env.process(self._handle_turn_submission(payload))
+            elif logger.enabled(logger.WARNING, "gamelogic"):
                 self._log(f"unknown_message type={mtype} from={src}")
 
     # -------------------------------------------------------------
     # Handle new match created
     # -------------------------------------------------------------
-    def _handle_match(self, payload: dict):
-        match_id = payload["match_id"]
-        players = payload.get("players", [])
+    def _handle_match(self, payload: Match):
+        match_id = payload.match_id
+        requested = self.env.now
+
+        with self.servers.request() as slot:
+            yield slot
+            self.slots.acquire()
+            try:
+                self.metrics.record(
+                    "game_server_wait",
+                    self.env.now - requested,
+                    timestamp=self.env.now,
+                    match_id=match_id
+                )
+                self._record_slots()
+
+                yield from self._play_match(payload)
+            finally:
+                self.slots.release()  # also when the match raises or is interrupted
+        self._record_slots()
+
+    # -------------------------------------------------------------
+    # Trace replay
+    # -------------------------------------------------------------
+    def _trace_turns(self, players):
+        """
+        Recorded (durations, pubsub delays, dropout) of the trace match of
+        the first player found in the trace, or None.
+        """
+        for p in players:
+            trace_match = self.trace.match_of(p.id)
+            if trace_match is not None:
+                return self.trace.turns(trace_match)
+        return None
+
+    # -------------------------------------------------------------
+    # Play a match on an acquired game-server slot
+    # -------------------------------------------------------------
+    def _play_match(self, payload: Match):
+        match_id = payload.match_id
+        players = payload.players or []
         start_ts = self.env.now
 
-        self._log(f"match_start id={match_id}")
+        if logger.enabled(logger.INFO, "gamelogic"):
+            self._log(f"match_start id={match_id}")
 
-        # determine number of turns
-        num_turns = max(1, int(random.gauss(AVG_TURNS_PER_MATCH, 2)))
+        # normalize player objects (bare ids become Player records)
+        processed_players = [p if hasattr(p, "id") else Player(p, skill=DEFAULT_SKILL) for p in players]
 
-        # normalize player objects
-        processed_players: List[Any] = []
-        for p in players:
-            if hasattr(p, "id"):
-                processed_players.append(p)
-            else:
-                class _P: pass
-                tmp = _P()
-                tmp.id = p
-                processed_players.append(tmp)
+        # determine number of turns (recorded, or sampled)
+        replay = self._trace_turns(processed_players) if self.trace is not None else None
+        if replay is None:
+            num_turns = max(1, int(self.rng.gauss(self.scenario.avg_turns_per_match, 2)))
+        else:
+            turn_durations, turn_delays, dropped = replay
+            num_turns = len(turn_durations)
 
         # ---------------------------------------------------------
         # Turn loop
@@ -97,12 +164,15 @@ class GameLogicService:
             turn_start = self.env.now
 
             # simulate turn processing
-            think_time = max(0.01, random.gauss(AVG_TIME_PER_TURN, TURN_TIME_STD))
+            if replay is None:
+                think_time = max(0.01, self.rng.gauss(self.scenario.avg_time_per_turn, self.scenario.turn_time_std))
+            else:
+                think_time = float(turn_durations[turn - 1])
             yield self.env.timeout(think_time)
 
             # persist turn state
             yield self.env.process(
-                self.storage.write(f"{match_id}:turn:{turn}", {"player": current.id, "ts": self.env.now})
+                self.storage.write(f"{match_id}:turn:{turn}", TurnCompleted(match_id, turn, current.id, self.env.now))
             )
 
             # publish turn_completed
@@ -110,7 +180,8 @@ class GameLogicService:
             self.broker.publish(
                 topic="turn_completed",
                 message=payload_msg,
-                publisher_name="GameLogicService"
+                publisher_name="GameLogicService",
+                delay=None if replay is None else float(turn_delays[turn - 1]) * self.scenario.trace_delay_scale
             )
 
             # metrics & logging
@@ -122,12 +193,15 @@ class GameLogicService:
                 match_id=match_id,
                 turn=turn
             )
-            self._log(f"turn_complete match={match_id} turn={turn} by={current.id} latency={turn_latency:.3f}")
+            if logger.enabled(logger.DEBUG, "gamelogic"):
+                self._log(f"turn_complete match={match_id} turn={turn} by={current.id} latency={turn_latency:.3f}")
 
         # ---------------------------------------------------------
         # Match finished
         # ---------------------------------------------------------
         duration = self.env.now - start_ts
+        if replay is not None and dropped:
+            self.metrics.record("match_dropout", 1, timestamp=self.env.now, match_id=match_id)
         self.metrics.record(
             "match_duration",
             duration,
@@ -135,4 +209,5 @@ class GameLogicService:
             match_id=match_id,
             turns=num_turns
         )
-        self._log(f"match_end id={match_id} duration={duration:.3f} turns={num_turns}")
+        if logger.enabled(logger.INFO, "gamelogic"):
+            self._log(f"match_end id={match_id} duration={duration:.3f} turns={num_turns}")
@@ -0,0 +1,175 @@
+# services/match_queues.py
+import heapq
+import math
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+
+from utils.records import DEFAULT_SKILL
+
+# (enqueued_at, player)
+QueueEntry = Tuple[float, Any]
+
+
+class FifoMatchQueue:
+    """
+    First-come-first-served queue: groups whoever has waited longest.
+    add() returns a ticket that identifies the player for take_around().
+    """
+
+    def __init__(self, players_per_match: int):
+        self.players_per_match = players_per_match
+        self._entries = OrderedDict()  # seq -> (enqueued_at, player)
+        self._seq = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, ticket):
+        return ticket in self._entries
+
+    def add(self, player, now: float) -> int:
+        self._seq += 1
+        self._entries[self._seq] = (now, player)
+        return self._seq
+
+    def take(self, now: float) -> Optional[List[QueueEntry]]:
+        if len(self._entries) < self.players_per_match:
+            return None
+        return [self._entries.popitem(last=False)[1] for _ in range(self.players_per_match)]
+
+    def take_around(self, ticket: int, size: int) -> List[QueueEntry]:
+        """
+        Remove the ticket's player plus up to size - 1 of the longest waiters.
+        """
+        group = [self._entries.pop(ticket)]
+        while len(group) < size and self._entries:
+            group.append(self._entries.popitem(last=False)[1])
+        return group
+
+    def next_due(self) -> Optional[float]:
+        # a FIFO group is either ready now or waits for more arrivals
+        return None
+
+
+class SkillMatchQueue:
+    """
+    Skill-indexed queue with widening search windows.
+
+    Players are kept in a list sorted by (skill, arrival sequence), so the
+    nearest-skill neighbours of any player are found with a binary search.
+    A group of players_per_match skill-adjacent players becomes acceptable
+    once its skill spread fits the window of its longest-waiting member:
+
+        window(wait) = min(window_max, window_base + window_growth * wait)
+
+    Every candidate group is pushed onto a heap keyed by the time it becomes
+    acceptable. Only groups that include a newly inserted player, or that
+    span a gap left by a removed one, are (re)computed, so each add/take
+    costs O(log n) heap and search work instead of a scan of the queue.
+    add() returns a ticket that identifies the player for take_around().
+    """
+
+    def __init__(self, players_per_match: int, window_base: float, window_growth: float, window_max: float):
+        self.players_per_match = players_per_match
+        self.window_base = window_base
+        self.window_growth = window_growth
+        self.window_max = window_max
+        self._index: List[Tuple[float, int]] = []  # sorted (skill, seq)
+        self._entries = {}                          # seq -> (enqueued_at, player)
+        self._candidates = []                       # heap of (acceptable_at, seq_tuple)
+        self._seq = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, ticket):
+        return ticket in self._entries
+
+    @staticmethod
+    def skill_of(player) -> float:
+        return getattr(player, "skill", DEFAULT_SKILL)
+
+    # -------------------------------------------------------------
+    def add(self, player, now: float) -> int:
+        self._seq += 1
+        key = (self.skill_of(player), self._seq)
+        self._entries[self._seq] = (now, player)
+        insort(self._index, key)
+        pos = bisect_left(self._index, key)
+        # every window of k adjacent players that contains the newcomer
+        self._push_windows(pos - self.players_per_match + 1, pos)
+        return self._seq
+
+    def take(self, now: float) -> Optional[List[QueueEntry]]:
+        while self._candidates and self._candidates[0][0] <= now:
+            _, seqs = heapq.heappop(self._candidates)
+            if all(s in self._entries for s in seqs):
+                return self._remove(seqs)
+        return None
+
+    def take_around(self, ticket: int, size: int) -> List[QueueEntry]:
+        """
+        Remove the ticket's player plus up to size - 1 nearest-skill players,
+        ignoring the search window.
+        """
+        player = self._entries[ticket][1]
+        pos = bisect_left(self._index, (self.skill_of(player), ticket))
+        skill = self._index[pos][0]
+        left, right = pos - 1, pos + 1
+        seqs = [ticket]
+        while len(seqs) < size and (left >= 0 or right < len(self._index)):
+            take_left = right >= len(self._index) or (
+                left >= 0 and skill - self._index[left][0] <= self._index[right][0] - skill
+            )
+            if take_left:
+                seqs.append(self._index[left][1])
+                left -= 1
+            else:
+                seqs.append(self._index[right][1])
+                right += 1
+        return self._remove(seqs)
+
+    def next_due(self) -> Optional[float]:
+        # drop heads whose players were already matched elsewhere
+        while self._candidates and not all(s in self._entries for s in self._candidates[0][1]):
+            heapq.heappop(self._candidates)
+        return self._candidates[0][0] if self._candidates else None
+
+    # -------------------------------------------------------------
+    def _acceptable_at(self, keys) -> float:
+        spread = keys[-1][0] - keys[0][0]
+        if spread > self.window_max:
+            return math.inf
+        oldest = min(self._entries[seq][0] for _, seq in keys)
+        if spread <= self.window_base:
+            return oldest
+        if self.window_growth <= 0:
+            return math.inf
+        return oldest + (spread - self.window_base) / self.window_growth
+
+    def _push_windows(self, first_start: int, last_start: int):
+        k = self.players_per_match
+        for start in range(max(0, first_start), min(last_start, len(self._index) - k) + 1):
+            keys = self._index[start:start + k]
+            at = self._acceptable_at(keys)
+            if at != math.inf:
+                heapq.heappush(self._candidates, (at, tuple(seq for _, seq in keys)))
+
+    def _remove(self, seqs) -> List[QueueEntry]:
+        k = self.players_per_match
+        group = []
+        gaps = []
+        for seq in seqs:
+            enqueued_at, player = self._entries.pop(seq)
+            key = (self.skill_of(player), seq)
+            pos = bisect_left(self._index, key)
+            del self._index[pos]
+            gaps.append(key)
+            group.append((enqueued_at, player))
+
+        # windows that now bridge a gap (contain both neighbours of a removed key)
+        for key in gaps:
+            pos = bisect_left(self._index, key)
+            self._push_windows(pos - k + 1, pos - 1)
+        return group
@@ -1,86 +1,268 @@
+import heapq
 import simpy
-import random
 from collections import deque
 from typing import Any
-from config import PLAYERS_PER_MATCH, MATCHMAKING_BATCH_TIMEOUT
+from config import Scenario
+from services.match_queues import FifoMatchQueue, SkillMatchQueue
+from utils import logger
 from utils.helpers import make_message
+from utils.records import Match, Player
+from utils.variates import VariateBank
+
+TIMEOUT_ACTIONS = ("none", "backfill", "relax", "drop")
 
 class MatchmakingService:
-    def __init__(self, env, name, storage, network, broker, metrics, match_creator_node=None):
+    """
+    Matchmaking service node.
+    Subscribes to "player_authenticated" and queues players.
+    A pool of MATCHMAKER_CAPACITY workers forms matches from the shared
+    queue in parallel; each persists and publishes its own "match_created".
+    MATCHMAKING_MODE selects the queue: "fifo" pairs in arrival order,
+    "skill" pairs nearest skills within a window that widens with wait time.
+
+    Each queued player gets a deadline MATCHMAKING_BATCH_TIMEOUT after it
+    joins. A single scheduler process sleeps until the earliest pending
+    deadline and then applies MATCHMAKING_TIMEOUT_ACTION to that player:
+      none     - keep waiting
+      backfill - match now with the nearest queued players, topped up with bots
+      relax    - match now with the nearest queued players, ignoring skill
+                 windows (waits for the next arrival if the queue is too short)
+      drop     - remove the player from the queue
+    """
+
+    def __init__(self, env, name, storage, network, broker, metrics, match_creator_node=None, scenario=None, variates=None):
         self.env = env
         self.name = name
         self.storage = storage
         self.network = network
         self.broker = broker
         self.metrics = metrics
-        self.queue = deque()
+        self.scenario = scenario or Scenario()
+        self.rng = (variates or VariateBank(self.scenario.random_seed)).stream("matchmaking")
+        self.queue = self._make_queue()
         self.inbox = simpy.Store(env)
         self.match_creator_node = match_creator_node
 
+        # workers sleep on this event until the queue changes
+        self._queue_changed = env.event()
+        self._worker_busy = [0.0] * self.scenario.matchmaker_capacity
+
+        # groups already formed by timeout actions, waiting for a worker
+        self._ready = deque()
+
+        # per-player deadline heap of (deadline, ticket)
+        self.timeout_action = self.scenario.matchmaking_timeout_action
+        if self.timeout_action not in TIMEOUT_ACTIONS:
+            raise ValueError(f"Unknown matchmaking timeout action: {self.timeout_action}")
+        self._deadlines = []
+        self._deadline_added = env.event()
+        self._relaxed = deque()  # tickets waiting for enough players to relax into
+        self._bots = 0
+
         broker.subscribe("player_authenticated", self)
         self.env.process(self._run())
-        self.env.process(self._flush_loop())
+        if self.timeout_action != "none":
+            self.env.process(self._deadline_loop())
+        for worker_id in range(self.scenario.matchmaker_capacity):
+            self.env.process(self._worker(worker_id))
 
     # -------------------------------------------------------------
     def notify(self, topic, msg, src):
         return self.inbox.put((msg, src))
 
+    # -------------------------------------------------------------
+    def _make_queue(self):
+        sc = self.scenario
+        if sc.matchmaking_mode == "fifo":
+            return FifoMatchQueue(sc.players_per_match)
+        if sc.matchmaking_mode == "skill":
+            return SkillMatchQueue(
+                sc.players_per_match,
+                window_base=sc.skill_window_base,
+                window_growth=sc.skill_window_growth,
+                window_max=sc.skill_window_max
+            )
+        raise ValueError(f"Unknown matchmaking mode: {sc.matchmaking_mode}")
+
+    # -------------------------------------------------------------
+    # Call sites check logger.enabled(..., "matchmaking") before formatting msg.
+    def _log(self, msg: str):
+        if logger.console_enabled():
+            print(msg)
+
     # -------------------------------------------------------------
     def _enqueue(self, player: Any):
-        self.queue.append(player)
+        ticket = self.queue.add(player, self.env.now)
         self.metrics.record("queue_length", len(self.queue
         ), timestamp=self.env.now)
-        print(f"[MATCHMAKING] Queue add player_id={player.id} queue_len={len(self.queue)}")
+        if logger.enabled(logger.DEBUG, "matchmaking"):
+            self._log(f"[MATCHMAKING] Queue add player_id={player.id} queue_len={len(self.queue)}")
+
+        if self.timeout_action != "none":
+            heapq.heappush(self._deadlines, (self.env.now + self.scenario.matchmaking_batch_timeout, ticket))
+            if not self._deadline_added.triggered:
+                self._deadline_added.succeed()
+        self._retry_relaxed()
+        self._wake_workers()
+
+    # -------------------------------------------------------------
+    def _wake_workers(self):
+        event, self._queue_changed = self._queue_changed, self.env.event()
+        event.succeed()
+
+    # -------------------------------------------------------------
+    def _take_players(self):
+        """
+        Atomically remove one match worth of players from the queue.
+        Runs without yielding, so workers never see a half-taken group.
+        """
+        if self._ready:
+            group, bots = self._ready.popleft()
+        else:
+            group, bots = self.queue.take(self.env.now), []
+            if group is None:
+                return None
+
+        players = []
+        for enqueued_at, player in group:
+            self.metrics.record("queue_wait", self.env.now - enqueued_at, timestamp=self.env.now, player_id=player.id)
+            players.append(player)
+        self.metrics.record("queue_length", len(self.queue), timestamp=self.env.now)
+        players.extend(bots)
+
+        # match quality next to time-to-match
+        skills = [SkillMatchQueue.skill_of(p) for p in players]
+        self.metrics.record(
+            "match_skill_delta",
+            max(skills) - min(skills),
+            timestamp=self.env.now,
+            max_wait=self.env.now - min(enqueued_at for enqueued_at, _ in group)
+        )
+        return players
 
     # -------------------------------------------------------------
-    def _create_match_from_queue(self):
-        while len(self.queue) >= PLAYERS_PER_MATCH:
-            players = [self.queue.popleft() for _ in range(PLAYERS_PER_MATCH)]
-            match_id = f"match-{int(self.env.now*1000)}-{random.randint(1000,9999)}"
-            self.metrics.record("matches_created", 1, timestamp=self.env.now, match_id=match_id)
-            print(f"[MATCHMADE] id={match_id} players={[p.id for p in players]}")
-
-            # Persist match metadata
-            yield self.env.process(
-                self.storage.write(f"match:{match_id}", {"players": [p.id for p in players], "ts": self.env.now})
+    def _form_match(self, players):
+        match_id = f"match-{int(self.env.now*1000)}-{1000 + int(self.rng.random() * 9000)}"
+        self.metrics.record("matches_created", 1, timestamp=self.env.now, match_id=match_id)
+        if logger.enabled(logger.INFO, "matchmaking"):
+            self._log(f"[MATCHMADE] id={match_id} players={[p.id for p in players]}")
+
+        # Persist match metadata
+        yield self.env.process(
+            self.storage.write(f"match:{match_id}", Match(match_id, players, self.env.now))
+        )
+
+        # Publish match_created
+        payload = make_message(match_id=match_id, players=players, ts=self.env.now)
+        self.broker.publish(topic="match_created", message=payload, publisher_name="MatchmakingService")
+
+        # Optional direct network send
+        if self.match_creator_node and self.network:
+            self.network.send(
+                src=self.name,
+                dst=self.match_creator_node,
+                msg=payload
             )
 
-            # Publish match_created
-            payload = make_message(match_id=match_id, players=players, ts=self.env.now)
-            self.broker.publish(topic="match_created", message=payload, publisher_name="MatchmakingService")
+    # -------------------------------------------------------------
+    def _worker(self, worker_id: int):
+        while True:
+            players = self._take_players()
+            if players is None:
+                # sleep until the queue changes or a waiting group becomes acceptable
+                due = self.queue.next_due()
+                if due is None:
+                    yield self._queue_changed
+                else:
+                    yield self._queue_changed | self.env.timeout(max(0.0, due - self.env.now))
+                continue
+
+            started = self.env.now
+            yield from self._form_match(players)
+            self._worker_busy[worker_id] += self.env.now - started
+
+            self.metrics.record(
+                "matchmaker_utilization",
+                self._worker_busy[worker_id] / self.env.now if self.env.now > 0 else 0.0,
+                timestamp=self.env.now,
+                worker=worker_id
+            )
+
+    # -------------------------------------------------------------
+    # Deadline scheduler
+    # -------------------------------------------------------------
+    def _deadline_loop(self):
+        while True:
+            # deadlines of players matched in the meantime are discarded lazily
+            while self._deadlines and self._deadlines[0][1] not in self.queue:
+                heapq.heappop(self._deadlines)
+
+            if not self._deadlines:
+                # idle: no events at all until somebody joins the queue
+                self._deadline_added = self.env.event()
+                yield self._deadline_added
+                continue
 
-            # Optional direct network send
-            if self.match_creator_node and self.network:
-                self.network.send(
-                    src=self.name,
-                    dst=self.match_creator_node,
-                    msg={"type": "match_created", "payload": {"match_id": match_id, "players": players}}
-                )
+            deadline, ticket = self._deadlines[0]
+            if deadline > self.env.now:
+                # deadlines are pushed in increasing order, so the head can only move later
+                yield self.env.timeout(deadline - self.env.now)
+                continue
+
+            heapq.heappop(self._deadlines)
+            self._on_timeout(ticket)
+
+    def _on_timeout(self, ticket):
+        k = self.scenario.players_per_match
+        self.metrics.record("matchmaking_timeout", 1, timestamp=self.env.now, action=self.timeout_action)
+
+        if self.timeout_action == "drop":
+            (enqueued_at, player), = self.queue.take_around(ticket, 1)
+            self.metrics.record("queue_dropped", self.env.now - enqueued_at, timestamp=self.env.now, player_id=player.id)
+            self.metrics.record("queue_length", len(self.queue), timestamp=self.env.now)
+            if logger.enabled(logger.INFO, "matchmaking"):
+                self._log(f"[MATCHMAKING] Timeout drop player_id={player.id}")
+
+        elif self.timeout_action == "backfill":
+            group = self.queue.take_around(ticket, k)
+            skill = SkillMatchQueue.skill_of(group[0][1])
+            bots = [self._make_bot(skill) for _ in range(k - len(group))]
+            if bots:
+                self.metrics.record("bot_backfilled", len(bots), timestamp=self.env.now)
+            self._ready.append((group, bots))
+            self._wake_workers()
+
+        elif self.timeout_action == "relax":
+            self._relaxed.append(ticket)
+            self._retry_relaxed()
+            self._wake_workers()
+
+    def _retry_relaxed(self):
+        k = self.scenario.players_per_match
+        while self._relaxed and len(self.queue) >= k:
+            ticket = self._relaxed.popleft()
+            if ticket in self.queue:
+                self._ready.append((self.queue.take_around(ticket, k), []))
+
+    def _make_bot(self, skill):
+        self._bots += 1
+        bot = Player(f"bot-{self._bots}", skill=skill, name=f"bot_{self._bots}")
+        bot.is_bot = True
+        return bot
 
     # -------------------------------------------------------------
     def _run(self):
         while True:
             msg, src = yield self.inbox.get()
-            mtype = msg.get("type")
+            mtype, player = msg
             if mtype == "player_authenticated":
-                player = msg["payload"]["player"]
                 self._enqueue(player)
-                yield self.env.process(self._create_match_from_queue())
-            else:
-                print(f"[MATCHMAKING] Unknown message type={mtype}")
-
-    # -------------------------------------------------------------
-    def _flush_loop(self):
-        while True:
-            yield self.env.timeout(MATCHMAKING_BATCH_TIMEOUT)
-            # Flush any remaining matches in queue
-            if len(self.queue) >= PLAYERS_PER_MATCH:
-                yield self.env.process(self._create_match_from_queue())
+            elif logger.enabled(logger.WARNING, "matchmaking"):
+                self._log(f"[MATCHMAKING] Unknown message type={mtype}")
 
     # -------------------------------------------------------------
     # Call at end of simulation to flush leftover players
     def flush_remaining(self):
         if self.queue:
-            print(f"[MATCHMAKING] Flushing remaining {len(self.queue)} players")
-            while len(self.queue) >= PLAYERS_PER_MATCH:
-                self.env.process(self._create_match_from_queue())
+            logger.emit(logger.INFO, "matchmaking", f"[MATCHMAKING] Flushing remaining {len(self.queue)} players")
+            self._wake_workers()
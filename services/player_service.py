@@ -1,16 +1,20 @@
 # services/player_service.py
 import simpy
-import random
-from config import STORAGE_WRITE_MEAN, STORAGE_WRITE_STD
+from config import Scenario
+from utils import logger
+from utils.records import Message
+from utils.variates import VariateBank
 
 class PlayerService:
-    def __init__(self, env, name, storage, network, broker, metrics):
+    def __init__(self, env, name, storage, network, broker, metrics, scenario=None, variates=None):
         self.env = env
         self.name = name
         self.storage = storage
         self.network = network
         self.broker = broker
         self.metrics = metrics
+        self.scenario = scenario or Scenario()
+        self.rng = (variates or VariateBank(self.scenario.random_seed)).stream("player_service")
         self.inbox = simpy.Store(env)
 
         # Subscribe to input topic
@@ -22,10 +26,10 @@ class PlayerService:
         return "<PlayerService>"
 
     # ---------------------------------------------------------
-    # Helper to create message dict
+    # Helper to create message
     # ---------------------------------------------------------
     def _make_message(self, player):
-        return {"type": "player_authenticated", "payload": {"player": player}}
+        return Message("player_authenticated", player)
 
     # ---------------------------------------------------------
     # Handle inbound messages
@@ -42,9 +46,10 @@ class PlayerService:
     def _log(self, msg: str):
         """
         Convert old string log to structured metrics event.
+        Call sites check logger.enabled(..., "player_service") before formatting msg.
         """
-        s = f"{self.env.now:.3f}: [PLAYERSERVICE] {msg}"
-        print(s)
+        if logger.console_enabled():
+            print(f"{self.env.now:.3f}: [PLAYERSERVICE] {msg}")
         # Use structured payload for metrics
         self.metrics.log_event(
             event_type="player_service_log",
@@ -58,7 +63,7 @@ class PlayerService:
     def _run(self):
         while True:
             msg, src = yield self.inbox.get()
-            player = msg["payload"]["player"]
+            player = msg.payload
             yield self.env.process(self._handle_player_arrival(player))
 
     # ---------------------------------------------------------
@@ -71,8 +76,9 @@ class PlayerService:
             # -------------------------
             # Simulate authentication using storage write delay as proxy
             # -------------------------
-            auth_latency = max(0.01, random.gauss(STORAGE_WRITE_MEAN, STORAGE_WRITE_STD))
+            auth_latency = max(0.01, self.rng.gauss(self.scenario.storage_write_mean, self.scenario.storage_write_std))
             yield self.env.timeout(auth_latency)
+            self.metrics.record("auth_latency", auth_latency, timestamp=self.env.now, player_id=pid)
 
             # -------------------------
             # Write to storage
@@ -90,7 +96,8 @@ class PlayerService:
                 publisher_name="PlayerService"
             )
 
-            self._log(f"player_authenticated id={pid}")
+            if logger.enabled(logger.DEBUG, "player_service"):
+                self._log(f"player_authenticated id={pid}")
 
         except Exception as e:
             raise
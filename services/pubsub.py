@@ -1,22 +1,39 @@
 # services/pubsub.py
-import random
-from config import (
-    PUBSUB_DELAY_MEAN, PUBSUB_DELAY_STD,
-    PUBSUB_LOSS_PROB, PUBSUB_MAX_RETRIES, PUBSUB_RETRY_DELAY
-)
+import heapq
+from typing import Optional
+from config import Scenario
+from utils.variates import VariateBank
 
 
 class PubSub:
     """
     Simple broker simulation with delay + loss + retry.
     Uses unified log/event format and consistent message delivery across services.
+
+    PUBSUB_ENGINE selects how deliveries are scheduled:
+      heap    - a single broker drains a time-ordered heap of pending
+                deliveries and retries, woken by one alarm event per due
+                time (no per-message SimPy processes or generators)
+      process - one SimPy process per delivery (original implementation)
+    Both sample the same delay / loss / retry distributions.
     """
 
-    def __init__(self, env, metrics):
+    def __init__(self, env, metrics, scenario=None, variates=None):
         self.env = env
         self.metrics = metrics
+        self.scenario = scenario or Scenario()
+        self.rng = (variates or VariateBank(self.scenario.random_seed)).stream("pubsub")
         self.subscribers = {}  # topic -> list of subscriber objects
 
+        self.engine = self.scenario.pubsub_engine
+        if self.engine not in ("heap", "process"):
+            raise ValueError(f"Unknown pubsub engine: {self.engine}")
+
+        # heap engine state
+        self._pending = []  # heap of (due, seq, subscriber, topic, message, retries, published_at)
+        self._alarms = []   # heap of due times with an armed wake-up event
+        self._seq = 0
+
     # -------------------------------------------------------------
     # Subscription
     # -------------------------------------------------------------
@@ -29,30 +46,103 @@ class PubSub:
     # -------------------------------------------------------------
     # Publish
     # -------------------------------------------------------------
-    def publish(self, topic: str, message: dict, publisher_name: str):
+    def publish(self, topic: str, message: dict, publisher_name: str, delay: Optional[float] = None):
         """
         publish(topic, message, publisher_name)
+        delay fixes the first delivery attempt's latency (trace replay)
+        instead of sampling it; retries are still sampled.
         """
 
         if topic not in self.subscribers:
             return
 
+        if self.engine == "process":
+            for subscriber in self.subscribers[topic]:
+                self.env.process(self._deliver(subscriber, topic, message, delay))
+            return
+
+        sc = self.scenario
         for subscriber in self.subscribers[topic]:
-            self.env.process(self._deliver(subscriber, topic, message))
+            if delay is None:
+                first = max(0.0, self.rng.gauss(sc.pubsub_delay_mean, sc.pubsub_delay_std))
+            else:
+                first = delay
+            self._schedule(self.env.now + first, subscriber, topic, message, 0, self.env.now)
+
+    # -------------------------------------------------------------
+    # Heap engine
+    # -------------------------------------------------------------
+    def _schedule(self, due, subscriber, topic, message, retries, published_at):
+        self._seq += 1
+        heapq.heappush(self._pending, (due, self._seq, subscriber, topic, message, retries, published_at))
+        # only arm a new alarm if this delivery is due before every armed one
+        if not self._alarms or due < self._alarms[0]:
+            self._arm(due)
+
+    def _arm(self, due):
+        heapq.heappush(self._alarms, due)
+        alarm = self.env.timeout(due - self.env.now, value=due)
+        alarm.callbacks.append(self._on_alarm)
+
+    def _on_alarm(self, alarm):
+        sc = self.scenario
+        pending = self._pending
+        now = self.env.now
+        # env.now can differ from the armed due time by float rounding
+        horizon = max(now, alarm.value)
+        while self._alarms and self._alarms[0] <= horizon:
+            heapq.heappop(self._alarms)
+
+        while pending and pending[0][0] <= horizon:
+            _, _, subscriber, topic, message, retries, published_at = heapq.heappop(pending)
+
+            # Simulate message loss
+            if self.rng.random() < sc.pubsub_loss_prob:
+                retries += 1
+                self.metrics.record(
+                    "pubsub_retry",
+                    1,
+                    timestamp=now,
+                    topic=topic,
+                    retries=retries
+                )
+                if retries <= sc.pubsub_max_retries:
+                    delay = max(0.0, self.rng.gauss(sc.pubsub_delay_mean, sc.pubsub_delay_std))
+                    self._schedule(now + sc.pubsub_retry_delay + delay, subscriber, topic, message, retries, published_at)
+                continue
+
+            # Successful delivery
+            self.metrics.record(
+                "pubsub_delivered",
+                1,
+                timestamp=now,
+                topic=topic,
+                delivered_to=str(subscriber)
+            )
+            self.metrics.record("pubsub_delay", now - published_at, timestamp=now, topic=topic)
+            subscriber.inbox.put((message, "PubSub"))
+
+        if pending and (not self._alarms or pending[0][0] < self._alarms[0]):
+            self._arm(pending[0][0])
 
     # -------------------------------------------------------------
-    # Delivery Simulation
+    # Delivery Simulation (process engine)
     # -------------------------------------------------------------
-    def _deliver(self, subscriber, topic, message):
+    def _deliver(self, subscriber, topic, message, first_delay=None):
+        sc = self.scenario
+        published_at = self.env.now
         retries = 0
 
-        while retries <= PUBSUB_MAX_RETRIES:
+        while retries <= sc.pubsub_max_retries:
             # Simulate network latency
-            delay = max(0.0, random.gauss(PUBSUB_DELAY_MEAN, PUBSUB_DELAY_STD))
+            if first_delay is not None and retries == 0:
+                delay = first_delay
+            else:
+                delay = max(0.0, self.rng.gauss(sc.pubsub_delay_mean, sc.pubsub_delay_std))
             yield self.env.timeout(delay)
 
             # Simulate message loss
-            if random.random() < PUBSUB_LOSS_PROB:
+            if self.rng.random() < sc.pubsub_loss_prob:
                 retries += 1
 
                 self.metrics.record(
@@ -64,7 +154,7 @@ class PubSub:
                 )
 
                 
-                yield self.env.timeout(PUBSUB_RETRY_DELAY)
+                yield self.env.timeout(sc.pubsub_retry_delay)
                 continue
 
             # Successful delivery
@@ -75,6 +165,7 @@ class PubSub:
                 topic=topic,
                 delivered_to=str(subscriber)
             )
+            self.metrics.record("pubsub_delay", self.env.now - published_at, timestamp=self.env.now, topic=topic)
 
             
             # Correct message format for all updated services:
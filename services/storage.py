@@ -1,46 +1,88 @@
 # services/storage.py
 import simpy
-import random
-from config import STORAGE_WRITE_MEAN, STORAGE_WRITE_STD
+from config import Scenario
+from utils import logger
+from utils.metrics import BusyCounter
+from utils.variates import VariateBank
 
 class Storage:
     """
     Simple document-style storage with simulated write latency.
     Fully instrumented with logging + metrics in the unified format.
+
+    STORAGE_ENGINE selects the write model:
+      unbounded - every write runs in parallel with its own latency
+                  (original implementation)
+      pool      - writes queue for one of STORAGE_POOL_SIZE connections
+                  (a simpy.Resource); latency grows with the number of busy
+                  connections (STORAGE_CONTENTION), and with
+                  STORAGE_GROUP_COMMIT concurrently queued writes share
+                  one commit. Records storage_pool_wait,
+                  storage_pool_utilization and storage_batch_size.
+    storage_write_latency is the end-to-end time of a write, queueing included.
     """
 
-    def __init__(self, env: simpy.Environment, metrics=None, name="storage"):
+    def __init__(self, env: simpy.Environment, metrics=None, name="storage", scenario=None, variates=None):
         self.env = env
         self.metrics = metrics
         self.name = name
+        self.scenario = scenario or Scenario()
+        self.rng = (variates or VariateBank(self.scenario.random_seed)).stream("storage")
         self.store = {}
 
+        self.engine = self.scenario.storage_engine
+        if self.engine not in ("unbounded", "pool"):
+            raise ValueError(f"Unknown storage engine: {self.engine}")
+        if self.scenario.storage_batch_max < 1:
+            raise ValueError(f"Storage batch max must be at least 1: {self.scenario.storage_batch_max}")
+
+        # pool engine state
+        self.pool = simpy.Resource(env, capacity=max(1, self.scenario.storage_pool_size))
+        self.connections = BusyCounter(env, self.pool.capacity)
+        self._pending = []      # group commit: (key, value, done event, enqueued_at)
+        self._leader = False    # a commit is already waiting for a connection
+
+    # Call sites check logger.enabled(..., "storage") before formatting msg.
     def _log(self, msg: str):
-        msg_str = f"{self.env.now:.3f}: STORAGE {msg}"
-        (msg_str)
+        if logger.console_enabled():
+            print(f"{self.env.now:.3f}: STORAGE {msg}")
         if self.metrics:
-            self.metrics.log_event(msg_str)
+            self.metrics.log_event(
+                event_type="storage_log",
+                payload={"message": msg},
+                timestamp=self.env.now
+            )
 
     def write(self, key, value):
         """
         Returns ONLY the generator process — callers wrap in env.process().
         """
-        return self._do_write(key, value)
+        if self.engine == "unbounded":
+            return self._do_write(key, value)
+        if self.scenario.storage_group_commit:
+            return self._batched_write(key, value)
+        return self._pool_write(key, value)
 
     def read(self, key):
         val = self.store.get(key, None)
-        self._log(f"READ key={key} -> {val}")
+        if logger.enabled(logger.DEBUG, "storage"):
+            self._log(f"READ key={key} -> {val}")
         return val
 
     def _do_write(self, key, value):
-        latency = max(0.01, random.gauss(STORAGE_WRITE_MEAN, STORAGE_WRITE_STD))
+        latency = max(0.01, self.rng.gauss(self.scenario.storage_write_mean, self.scenario.storage_write_std))
         start = self.env.now
 
         yield self.env.timeout(latency)
+        self._commit(key, value, start)
+        return True
+
+    def _commit(self, key, value, start):
         self.store[key] = value
 
         duration = self.env.now - start
-        self._log(f"WRITE key={key} latency={duration:.3f} value={value}")
+        if logger.enabled(logger.DEBUG, "storage"):
+            self._log(f"WRITE key={key} latency={duration:.3f} value={value}")
 
         if self.metrics:
             self.metrics.record(
@@ -50,4 +92,83 @@ class Storage:
                 key=key
             )
 
+    # -------------------------------------------------------------
+    # Pool engine
+    # -------------------------------------------------------------
+    def pool_utilization(self) -> float:
+        """
+        Time-weighted fraction of connections in use since the start.
+        """
+        return self.connections.utilization()
+
+    def _service_time(self, batch_size: int = 1) -> float:
+        """
+        Commit latency on a connection: the base write latency, inflated
+        linearly up to 1 + STORAGE_CONTENTION as the other connections fill
+        up, plus STORAGE_BATCH_ITEM_COST per extra write in a group commit.
+        """
+        sc = self.scenario
+        base = max(0.01, self.rng.gauss(sc.storage_write_mean, sc.storage_write_std))
+        others = (self.connections.busy - 1) / max(1, self.pool.capacity - 1)
+        return base * (1 + sc.storage_contention * others) + sc.storage_batch_item_cost * (batch_size - 1)
+
+    def _record_pool(self, waits):
+        if not self.metrics:
+            return
+        now = self.env.now
+        for key, wait in waits:
+            self.metrics.record("storage_pool_wait", wait, timestamp=now, key=key)
+        self.metrics.record("storage_pool_utilization", self.pool_utilization(), timestamp=now)
+
+    def _pool_write(self, key, value):
+        start = self.env.now
+        with self.pool.request() as conn:
+            yield conn
+            self.connections.acquire()
+            self._record_pool([(key, self.env.now - start)])
+
+            yield self.env.timeout(self._service_time())
+            self.connections.release()
+        self._commit(key, value, start)
         return True
+
+    def _batched_write(self, key, value):
+        done = self.env.event()
+        self._pending.append((key, value, done, self.env.now))
+        if not self._leader:
+            self._leader = True
+            self.env.process(self._group_commit())
+        yield done
+        return True
+
+    def _group_commit(self):
+        """
+        One commit: wait for a connection, optionally hold it for
+        STORAGE_BATCH_WINDOW to gather more writes, then commit up to
+        STORAGE_BATCH_MAX queued writes with a single latency. Writes
+        arriving meanwhile queue behind the next commit, so batches grow
+        as the pool saturates.
+        """
+        sc = self.scenario
+        with self.pool.request() as conn:
+            yield conn
+            self.connections.acquire()
+            if sc.storage_batch_window > 0 and len(self._pending) < sc.storage_batch_max:
+                yield self.env.timeout(sc.storage_batch_window)
+
+            batch = self._pending[:sc.storage_batch_max]
+            del self._pending[:sc.storage_batch_max]
+            self._leader = bool(self._pending)
+            if self._leader:
+                self.env.process(self._group_commit())
+
+            self._record_pool([(key, self.env.now - enqueued) for key, _, _, enqueued in batch])
+            if self.metrics:
+                self.metrics.record("storage_batch_size", len(batch), timestamp=self.env.now)
+
+            yield self.env.timeout(self._service_time(len(batch)))
+            self.connections.release()
+
+        for key, value, done, enqueued in batch:
+            self._commit(key, value, enqueued)
+            done.succeed()
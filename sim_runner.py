@@ -1,39 +1,69 @@
 # sim_runner.py (FINAL FIXED VERSION)
+import argparse
 import simpy
 import random
 import os
-import csv
+import json
+import math
 import sys
 import traceback
 from datetime import datetime, timezone
 from pathlib import Path
 
-from config import SIM_TIME, PLAYER_ARRIVAL_RATE, RANDOM_SEED, USE_CSV_DATA, CSV_DATA_PATH
+from config import Scenario
+from utils import logger
+from utils.arrivals import ArrivalProcess, rate_curve_from_scenario
 from utils.generators import poisson_interarrival, sample_player
 from utils.metrics import MetricsCollector
+from utils.records import Message, Player
+from utils.trace import MatchTrace, load_arrivals
+from utils.variates import VariateBank
 from services.storage import Storage
 from services.pubsub import PubSub
 from services.player_service import PlayerService
 from services.matchmaking_service import MatchmakingService
 from services.game_logic_service import GameLogicService
+from services.client_notifier import ClientNotifier
 
 # Fix import resolution
 sys.path.append(str(Path(__file__).parent.resolve()))
 
+ARRIVAL_BLOCK = 65536  # CSV arrivals converted to Python values per step
+
 
 # ---------------------------------------------------------
 # Synthetic player spawner
 # ---------------------------------------------------------
-def spawn_players(env, broker, max_players=100):
+def spawn_players(env, broker, max_players=None, scenario=None, variates=None):
+    """
+    Publish synthetic player arrivals. A constant rate draws exponential
+    inter-arrival times; any other scenario.arrival_model (or a burst)
+    follows its rate curve via utils.arrivals, drawn from the "arrivals"
+    stream of variates.
+    """
+    scenario = scenario or Scenario()
+    if max_players is None:
+        max_players = scenario.synthetic_max_players
+    curve = rate_curve_from_scenario(scenario)
+    arrivals = None
+    if curve is not None:
+        variates = variates or VariateBank(scenario.random_seed)
+        arrivals = ArrivalProcess(curve, variates.generator("arrivals"), start=env.now, horizon=scenario.sim_time)
     player_id = 1
-    while env.now < SIM_TIME and player_id <= max_players:
-        inter = poisson_interarrival(PLAYER_ARRIVAL_RATE)
+    while env.now < scenario.sim_time and player_id <= max_players:
+        if arrivals is None:
+            inter = poisson_interarrival(scenario.player_arrival_rate)
+        else:
+            next_arrival = arrivals.next()
+            if next_arrival == math.inf:
+                return  # the rate curve produces no more arrivals before sim_time
+            inter = next_arrival - env.now
         yield env.timeout(inter)
         p = sample_player(player_id)
 
         broker.publish(
             topic="player_arrival",
-            message={"type": "player_arrival", "payload": {"player": p}},
+            message=Message("player_arrival", p),
             publisher_name="sim_runner"
         )
         player_id += 1
@@ -42,36 +72,41 @@ def spawn_players(env, broker, max_players=100):
 # ---------------------------------------------------------
 # CSV-driven player spawner
 # ---------------------------------------------------------
-class CSVPlayer:
+class CSVPlayer(Player):
+    """Player replayed from a CSV trace (skill and arrival time from the file)."""
+    __slots__ = ()
+
     def __init__(self, player_id, skill, name, arrival_time):
-        self.id = player_id
-        self.skill = skill
-        self.name = name
-        self.arrival_time = arrival_time
-
-
-def spawn_players_from_csv(env, broker):
-    players_file = os.path.join(CSV_DATA_PATH, "players.csv")
-    if not os.path.exists(players_file):
-        raise FileNotFoundError(f"CSV players file not found: {players_file}")
-
-    with open(players_file, newline="") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            player = CSVPlayer(
-                player_id=int(row["player_id"]),
-                skill=int(row.get("skill", 50)),
-                name=row.get("name", f"player_{row['player_id']}"),
-                arrival_time=float(row["arrival_time"])
-            )
+        super().__init__(player_id, skill=skill, name=name, arrival_time=arrival_time)
 
-            wait = max(0, player.arrival_time - env.now)
-            if wait > 0:
-                yield env.timeout(wait)
 
+def spawn_players_from_csv(env, broker, csv_data_path=None):
+    """
+    Replay the arrivals of players.csv (or its csv.gz/parquet variant).
+    The arrival columns are loaded in one shot into a sorted array
+    (utils.trace.load_arrivals, memory-mapped after the first load) and
+    released by this single process: one timeout per distinct timestamp,
+    players sharing a timestamp go out together. Rows are turned into
+    Python values ARRIVAL_BLOCK at a time and a CSVPlayer is only built
+    as its player is published.
+    """
+    csv_data_path = csv_data_path or Scenario().csv_data_path
+    try:
+        arrivals = load_arrivals(csv_data_path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"CSV players file not found: {os.path.join(csv_data_path, 'players.csv')}")
+
+    for block in range(0, len(arrivals), ARRIVAL_BLOCK):
+        rows = arrivals[block:block + ARRIVAL_BLOCK]
+        for pid, arrival_time, skill in zip(rows["player_id"].tolist(), rows["arrival_time"].tolist(),
+                                            rows["skill"].tolist()):
+            if arrival_time > env.now:
+                yield env.timeout(arrival_time - env.now)
+
+            player = CSVPlayer(player_id=pid, skill=skill, name=None, arrival_time=arrival_time)
             broker.publish(
                 topic="player_arrival",
-                message={"type": "player_arrival", "payload": {"player": player}},
+                message=Message("player_arrival", player),
                 publisher_name="sim_runner"
             )
 
@@ -79,18 +114,38 @@ def spawn_players_from_csv(env, broker):
 # ---------------------------------------------------------
 # Simulation runner
 # ---------------------------------------------------------
-def run_once(out_dir):
+def run_once(out_dir, seed=None, scenario=None):
+    scenario = scenario or Scenario()
+    if seed is None:
+        seed = scenario.random_seed
 
     # Ensure output directory exists
     os.makedirs(out_dir, exist_ok=True)
-    print(f"[INFO] Outputs directory created: {out_dir}")
+    logger.emit(logger.INFO, "runner", f"[INFO] Outputs directory created: {out_dir}")
+
+    # Record the exact parameters of this run next to its outputs
+    with open(os.path.join(out_dir, "scenario.json"), "w") as f:
+        json.dump({**scenario.to_dict(), "random_seed": seed}, f, indent=2)
 
-    random.seed(RANDOM_SEED)
+    random.seed(seed)
+    variates = VariateBank(seed)  # independent per-service RNG streams
     env = simpy.Environment()
 
-    metrics = MetricsCollector(out_dir)
-    storage = Storage(env)
-    pubsub = PubSub(env, metrics)
+    metrics = MetricsCollector(
+        out_dir,
+        stream=scenario.metrics_streaming,
+        chunk_size=scenario.metrics_chunk_size,
+        flush_interval=scenario.metrics_flush_interval,
+        sketch_metrics=scenario.metrics_sketches,
+        drop_raw=scenario.metrics_drop_raw
+    )
+    storage = Storage(env, metrics=metrics, scenario=scenario, variates=variates)
+    pubsub = PubSub(env, metrics, scenario=scenario, variates=variates)
+
+    trace = None
+    if scenario.replay_trace:
+        trace = MatchTrace.load(scenario.csv_data_path)
+        logger.emit(logger.INFO, "runner", f"[INFO] Replaying {len(trace)} trace matches from {scenario.csv_data_path}")
 
     # Create service nodes
     game_logic = GameLogicService(
@@ -99,7 +154,10 @@ def run_once(out_dir):
         storage=storage,
         network=None,
         broker=pubsub,
-        metrics=metrics
+        metrics=metrics,
+        scenario=scenario,
+        variates=variates,
+        trace=trace
     )
 
     player_service = PlayerService(
@@ -108,7 +166,9 @@ def run_once(out_dir):
         storage=storage,
         network=None,
         broker=pubsub,
-        metrics=metrics
+        metrics=metrics,
+        scenario=scenario,
+        variates=variates
     )
 
     matchmaking = MatchmakingService(
@@ -118,21 +178,27 @@ def run_once(out_dir):
         network=None,
         broker=pubsub,
         metrics=metrics,
-        match_creator_node=game_logic
+        match_creator_node=game_logic,
+        scenario=scenario,
+        variates=variates
     )
 
+    if trace is not None:
+        # deliver turn_completed so the replayed pubsub delays are applied and recorded
+        ClientNotifier(env=env, name="clients", broker=pubsub)
+
     # ---------------------------
     # Start player spawners
     # ---------------------------
     try:
-        if USE_CSV_DATA:
-            print(f"[INFO] Using CSV-driven input from {CSV_DATA_PATH}")
-            if not os.path.isdir(CSV_DATA_PATH):
-                raise Exception(f"CSV_DATA_PATH is not a directory: {CSV_DATA_PATH}")
-            env.process(spawn_players_from_csv(env, pubsub))
+        if scenario.use_csv_data:
+            logger.emit(logger.INFO, "runner", f"[INFO] Using CSV-driven input from {scenario.csv_data_path}")
+            if not os.path.isdir(scenario.csv_data_path):
+                raise Exception(f"CSV_DATA_PATH is not a directory: {scenario.csv_data_path}")
+            env.process(spawn_players_from_csv(env, pubsub, scenario.csv_data_path))
         else:
-            print("[INFO] Using synthetic random arrivals")
-            env.process(spawn_players(env, pubsub))
+            logger.emit(logger.INFO, "runner", "[INFO] Using synthetic random arrivals")
+            env.process(spawn_players(env, pubsub, scenario=scenario, variates=variates))
     except Exception as e:
         print("[ERROR] Failed to start spawners:", e)
         traceback.print_exc()
@@ -142,9 +208,9 @@ def run_once(out_dir):
     # Run simulation
     # ---------------------------
     try:
-        print(f"[INFO] Starting simulation for SIM_TIME={SIM_TIME} ...")
-        env.run(until=SIM_TIME)
-        print("[INFO] Simulation time reached.")
+        logger.emit(logger.INFO, "runner", f"[INFO] Starting simulation for SIM_TIME={scenario.sim_time} ...")
+        env.run(until=scenario.sim_time)
+        logger.emit(logger.INFO, "runner", "[INFO] Simulation time reached.")
     except Exception as e:
         print("[ERROR] Simulation runtime error:", e)
         traceback.print_exc()
@@ -154,10 +220,10 @@ def run_once(out_dir):
     # Graceful shutdown + flush
     # ---------------------------
     try:
-        print("[INFO] Flushing pending matchmaking items...")
+        logger.emit(logger.INFO, "runner", "[INFO] Flushing pending matchmaking items...")
         matchmaking.flush_remaining()
 
-        print("[INFO] Running environment to drain remaining tasks...")
+        logger.emit(logger.INFO, "runner", "[INFO] Running environment to drain remaining tasks...")
         # run until no more events
         draining = True
         while draining:
@@ -166,14 +232,14 @@ def run_once(out_dir):
             draining = (env.now != prev_time)
 
     except Exception as e:
-        print("[WARN] Error during post-run flush:", e)
+        logger.emit(logger.WARNING, "runner", f"[WARN] Error during post-run flush: {e}")
 
     # ---------------------------
     # Save metrics
     # ---------------------------
     try:
         metrics_file = metrics.save()
-        print(f"[OK] Metrics saved to: {metrics_file}")
+        logger.emit(logger.INFO, "runner", f"[OK] Metrics saved to: {metrics_file}")
         return metrics_file
     except Exception as e:
         print("[ERROR] Failed to save metrics:", e)
@@ -185,11 +251,27 @@ def run_once(out_dir):
 # Entry point
 # ---------------------------------------------------------
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run one simulation")
+    parser.add_argument("--log-level", default=None, help="DEBUG, INFO, WARNING, ERROR or OFF (default: config.LOG_LEVEL)")
+    parser.add_argument("--log-categories", default=None, help="Comma-separated categories to log, e.g. matchmaking,runner")
+    parser.add_argument("--quiet", action="store_true", help="Headless run: no log output")
+    parser.add_argument("--replay", metavar="DATA_DIR", default=None,
+                        help="Replay players/matches/turns from this folder (trace-driven run)")
+    args = parser.parse_args()
+    categories = args.log_categories.split(",") if args.log_categories else None
+    logger.configure(level=args.log_level, categories=categories)
+    if args.quiet:
+        logger.quiet()
+
     ts = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
     out_dir = os.path.join("outputs", f"run_{ts}")
 
+    scenario = Scenario()
+    if args.replay:
+        scenario = scenario.replace(use_csv_data=True, csv_data_path=args.replay, replay_trace=True)
+
     try:
-        run_once(out_dir)
+        run_once(out_dir, scenario=scenario)
     except Exception as e:
         print("[FATAL] run_once raised an exception.")
         sys.exit(1)
@@ -0,0 +1,236 @@
+"""
+Time-varying arrival processes, shared by data_gen and the live spawner.
+
+A rate curve maps time (seconds) to an arrival rate (players/second) and
+knows its peak rate. ArrivalProcess samples a non-homogeneous Poisson
+process from any curve by vectorized thinning.
+"""
+import math
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+ARRIVAL_MODELS = ("constant", "diurnal", "piecewise", "empirical")
+
+THINNING_BATCH = 4096  # candidate arrivals drawn per thinning step
+
+
+# ---------------------------------------------------------
+# Rate curves
+# ---------------------------------------------------------
+class ConstantRate:
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.peak = rate
+
+    def __call__(self, t):
+        return np.full(np.shape(t), self.rate, dtype=float)
+
+
+class DiurnalRate:
+    """
+    Sinusoidal daily cycle: base * (1 + amplitude * cos(2*pi*(t - peak_time) / period)).
+    """
+
+    def __init__(self, base: float, amplitude: float = 0.5, period: float = 86400.0, peak_time: float = 0.0):
+        if not 0 <= amplitude <= 1:
+            raise ValueError(f"Diurnal amplitude must be in [0, 1]: {amplitude}")
+        if period <= 0:
+            raise ValueError(f"Diurnal period must be positive: {period}")
+        self.base = base
+        self.amplitude = amplitude
+        self.period = period
+        self.peak_time = peak_time
+        self.peak = base * (1 + amplitude)
+
+    def __call__(self, t):
+        phase = 2 * math.pi * (np.asarray(t, dtype=float) - self.peak_time) / self.period
+        return self.base * (1 + self.amplitude * np.cos(phase))
+
+
+class PiecewiseRate:
+    """
+    Step function: rates[i] from times[i] until times[i + 1]; rates[0]
+    before times[0]. With a period the pattern repeats.
+    """
+
+    def __init__(self, times: Sequence[float], rates: Sequence[float], period: Optional[float] = None):
+        if len(times) != len(rates) or not len(times):
+            raise ValueError("Piecewise rate needs one rate per breakpoint")
+        self.times = np.asarray(times, dtype=float)
+        self.rates = np.asarray(rates, dtype=float)
+        if np.any(np.diff(self.times) <= 0):
+            raise ValueError("Piecewise rate breakpoints must be increasing")
+        self.period = period
+        self.peak = float(self.rates.max())
+
+    def __call__(self, t):
+        t = np.asarray(t, dtype=float)
+        if self.period:
+            t = np.mod(t, self.period)
+        idx = np.searchsorted(self.times, t, side="right") - 1
+        return self.rates[np.clip(idx, 0, len(self.rates) - 1)]
+
+
+class EmpiricalRate:
+    """
+    Measured rate curve, linearly interpolated between samples and held
+    flat outside them (or repeated with a period).
+    """
+
+    def __init__(self, times: Sequence[float], rates: Sequence[float], period: Optional[float] = None):
+        self.times = np.asarray(times, dtype=float)
+        self.rates = np.asarray(rates, dtype=float)
+        if not len(self.times) or np.any(np.diff(self.times) <= 0):
+            raise ValueError("Empirical rate needs increasing sample times")
+        self.period = period
+        self.peak = float(self.rates.max())
+
+    @classmethod
+    def from_csv(cls, path: str, period: Optional[float] = None) -> "EmpiricalRate":
+        """
+        Load a curve from a CSV with `time` (seconds) and `rate`
+        (players/second) columns.
+        """
+        df = pd.read_csv(path)
+        if not {"time", "rate"} <= set(df.columns):
+            raise ValueError(f"Rate CSV needs 'time' and 'rate' columns: {path}")
+        df = df.sort_values("time")
+        return cls(df["time"].to_numpy(), df["rate"].to_numpy(), period)
+
+    def __call__(self, t):
+        t = np.asarray(t, dtype=float)
+        if self.period:
+            t = np.mod(t, self.period)
+        return np.interp(t, self.times, self.rates)
+
+
+class BurstRate:
+    """
+    A spike on top of another curve (e.g. launch day): inside
+    [start, start + duration) the rate is multiplied by `multiplier`,
+    decaying back towards 1x with time constant `decay` if decay > 0.
+    """
+
+    def __init__(self, curve, start: float, duration: float, multiplier: float, decay: float = 0.0):
+        self.curve = curve
+        self.start = start
+        self.duration = duration
+        self.multiplier = multiplier
+        self.decay = decay
+        self.peak = curve.peak * max(1.0, multiplier)
+
+    def __call__(self, t):
+        t = np.asarray(t, dtype=float)
+        since = t - self.start
+        inside = (since >= 0) & (since < self.duration)
+        factor = np.ones_like(t)
+        if self.decay > 0:
+            factor[inside] = 1 + (self.multiplier - 1) * np.exp(-since[inside] / self.decay)
+        else:
+            factor[inside] = self.multiplier
+        return self.curve(t) * factor
+
+
+def make_rate_curve(model: str, base_rate: float, amplitude: float = 0.5, period: float = 86400.0,
+                    peak_time: float = 0.0, piecewise_times=(), piecewise_rates=(), rate_csv: str = "",
+                    burst_start: float = 0.0, burst_duration: float = 0.0, burst_multiplier: float = 1.0,
+                    burst_decay: float = 0.0):
+    """
+    Build a rate curve from configuration values. Returns None for a plain
+    constant rate, so callers can keep their homogeneous fast path.
+    A burst (burst_duration > 0) can be stacked on any model.
+    A non-repeating piecewise/empirical curve must end on a positive rate:
+    it holds its last value forever, and a zero tail would never produce
+    another arrival.
+    """
+    if model not in ARRIVAL_MODELS:
+        raise ValueError(f"Unknown arrival model: {model} (expected one of {ARRIVAL_MODELS})")
+    if model == "constant":
+        curve = ConstantRate(base_rate)
+    elif model == "diurnal":
+        curve = DiurnalRate(base_rate, amplitude, period, peak_time)
+    elif model == "piecewise":
+        curve = PiecewiseRate([float(t) for t in piecewise_times], [float(r) for r in piecewise_rates], period or None)
+    else:
+        if not rate_csv:
+            raise ValueError("Empirical arrival model needs a rate CSV")
+        curve = EmpiricalRate.from_csv(rate_csv, period or None)
+
+    if model in ("piecewise", "empirical") and not curve.period and curve.rates[-1] <= 0:
+        raise ValueError(f"Non-periodic {model} arrival rate must end above 0 (set a period to repeat it)")
+    if burst_duration > 0 and burst_multiplier != 1:
+        curve = BurstRate(curve, burst_start, burst_duration, burst_multiplier, burst_decay)
+    elif model == "constant":
+        return None
+    return curve
+
+
+def rate_curve_from_scenario(scenario):
+    """
+    make_rate_curve() for a config.Scenario (rates in players/second).
+    """
+    return make_rate_curve(
+        scenario.arrival_model, scenario.player_arrival_rate,
+        amplitude=scenario.arrival_amplitude, period=scenario.arrival_period, peak_time=scenario.arrival_peak_time,
+        piecewise_times=scenario.arrival_piecewise_times, piecewise_rates=scenario.arrival_piecewise_rates,
+        rate_csv=scenario.arrival_rate_csv, burst_start=scenario.burst_start,
+        burst_duration=scenario.burst_duration, burst_multiplier=scenario.burst_multiplier,
+        burst_decay=scenario.burst_decay,
+    )
+
+
+# ---------------------------------------------------------
+# Sampling
+# ---------------------------------------------------------
+class ArrivalProcess:
+    """
+    Non-homogeneous Poisson arrivals from a rate curve by thinning: candidate
+    arrivals of a homogeneous process at the curve's peak rate are drawn
+    THINNING_BATCH at a time and kept with probability rate(t) / peak.
+    Accepted arrivals are buffered, so the sequence is the same however
+    many are taken per call (take(n) for blocks, next() for live spawning).
+    No candidates are drawn past `horizon` (e.g. the simulation end): then
+    next() returns inf and take() returns fewer than n arrivals.
+    """
+
+    def __init__(self, curve, rng: np.random.Generator, start: float = 0.0, horizon: float = math.inf):
+        if curve.peak <= 0:
+            raise ValueError("Arrival rate curve must have a positive peak rate")
+        self.curve = curve
+        self.rng = rng
+        self._clock = start
+        self.horizon = horizon
+        self._buffer = np.empty(0)
+        self._pos = 0
+
+    def _refill(self):
+        peak = self.curve.peak
+        candidates = self._clock + np.cumsum(self.rng.exponential(1 / peak, THINNING_BATCH))
+        keep = self.rng.random(THINNING_BATCH) * peak < self.curve(candidates)
+        self._clock = candidates[-1]
+        self._buffer = candidates[keep]
+        self._pos = 0
+
+    def take(self, n: int) -> np.ndarray:
+        out = []
+        while n > 0:
+            if self._pos >= len(self._buffer):
+                if self._clock >= self.horizon:
+                    break
+                self._refill()
+                continue
+            chunk = self._buffer[self._pos:self._pos + n]
+            self._pos += len(chunk)
+            n -= len(chunk)
+            out.append(chunk)
+        return np.concatenate(out) if out else np.empty(0)
+
+    def next(self) -> float:
+        while self._pos >= len(self._buffer):
+            if self._clock >= self.horizon:
+                return math.inf
+            self._refill()
+        self._pos += 1
+        return float(self._buffer[self._pos - 1])
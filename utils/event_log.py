@@ -0,0 +1,178 @@
+import ast
+import json
+import mmap
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+EVENTS_FILE = "events.log"
+INDEX_FILE = "events.idx"
+TYPES_FILE = "events.types.json"
+
+# one fixed-size record per event: byte range of its line in events.log,
+# its timestamp and its dictionary-encoded event_type
+INDEX_DTYPE = np.dtype([("offset", "<u8"), ("timestamp", "<f8"), ("length", "<u4"), ("type", "<i4")])
+
+
+def write_events(out_dir: str, events: List[Dict[str, Any]], types: Dict[str, int], append: bool = False) -> str:
+    """
+    Write events to events.log as JSON lines, plus the sidecar offset
+    index (events.idx) and event_type dictionary (events.types.json).
+    types maps event_type -> code and is extended in place, so pass the
+    same dict for every chunk of one run. Returns the events.log path.
+    """
+    log_path = os.path.join(out_dir, EVENTS_FILE)
+    mode = "ab" if append else "wb"
+    n = len(events)
+    offsets = np.empty(n, dtype=np.uint64)
+    lengths = np.empty(n, dtype=np.uint32)
+    codes = np.empty(n, dtype=np.int32)
+    timestamps = np.empty(n, dtype=np.float64)
+
+    with open(log_path, mode) as f, open(os.path.join(out_dir, INDEX_FILE), mode) as fi:
+        pos = f.tell()
+        lines = []
+        for i, ev in enumerate(events):
+            line = (json.dumps(ev, default=str, separators=(",", ":")) + "\n").encode()
+            code = types.get(ev["event_type"])
+            if code is None:
+                code = types[ev["event_type"]] = len(types)
+            ts = ev.get("timestamp")
+            offsets[i] = pos
+            lengths[i] = len(line)
+            codes[i] = code
+            timestamps[i] = np.nan if ts is None else ts
+            pos += len(line)
+            lines.append(line)
+        f.write(b"".join(lines))
+
+        index = np.empty(n, dtype=INDEX_DTYPE)
+        index["offset"] = offsets
+        index["timestamp"] = timestamps
+        index["length"] = lengths
+        index["type"] = codes
+        index.tofile(fi)
+
+    with open(os.path.join(out_dir, TYPES_FILE), "w") as f:
+        json.dump(sorted(types, key=types.get), f)
+    return log_path
+
+
+def _parse_line(line: bytes) -> Dict[str, Any]:
+    text = line.decode()
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        # logs written before the JSONL format held str(dict) lines
+        return ast.literal_eval(text)
+
+
+def build_index(run_path: str) -> np.ndarray:
+    """
+    Scan an events.log that has no sidecar index (e.g. an older run) once
+    and write events.idx / events.types.json next to it.
+    """
+    log_path = os.path.join(run_path, EVENTS_FILE)
+    types: Dict[str, int] = {}
+    records = []
+    pos = 0
+    with open(log_path, "rb") as f:
+        for line in f:
+            if line.strip():
+                ev = _parse_line(line)
+                code = types.setdefault(ev.get("event_type"), len(types))
+                ts = ev.get("timestamp")
+                records.append((pos, np.nan if ts is None else ts, len(line), code))
+            pos += len(line)
+    index = np.array(records, dtype=INDEX_DTYPE)
+    index.tofile(os.path.join(run_path, INDEX_FILE))
+    with open(os.path.join(run_path, TYPES_FILE), "w") as f:
+        json.dump([str(t) for t in sorted(types, key=types.get)], f)
+    return index
+
+
+class EventLog:
+    """
+    Read-only view of a run's events.log.
+    The log and its index are memory-mapped; filtering by event_type or
+    time range is done on the index, and only the matching lines are
+    parsed.
+    """
+
+    def __init__(self, run_path: str):
+        self.run_path = run_path
+        log_path = os.path.join(run_path, EVENTS_FILE)
+        if not os.path.exists(log_path):
+            raise FileNotFoundError(f"Events file not found: {log_path}")
+
+        index_path = os.path.join(run_path, INDEX_FILE)
+        if not os.path.exists(index_path):
+            build_index(run_path)
+        if os.path.getsize(index_path):
+            self.index = np.memmap(index_path, dtype=INDEX_DTYPE, mode="r")
+        else:
+            self.index = np.empty(0, dtype=INDEX_DTYPE)
+        with open(os.path.join(run_path, TYPES_FILE)) as f:
+            self.types: List[str] = json.load(f)
+
+        self._file = open(log_path, "rb")
+        size = os.path.getsize(log_path)
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __len__(self):
+        return len(self.index)
+
+    def close(self):
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def counts(self) -> Dict[str, int]:
+        """
+        Number of events per event_type, from the index alone.
+        """
+        codes, n = np.unique(self.index["type"], return_counts=True)
+        return {self.types[c]: int(k) for c, k in zip(codes, n)}
+
+    def select(self, event_types: Optional[Iterable[str]] = None,
+               start: Optional[float] = None, end: Optional[float] = None) -> np.ndarray:
+        """
+        Positions of the events matching event_types and start <= timestamp < end.
+        """
+        mask = np.ones(len(self.index), dtype=bool)
+        if event_types is not None:
+            wanted = [self.types.index(t) for t in event_types if t in self.types]
+            mask &= np.isin(self.index["type"], wanted)
+        if start is not None:
+            mask &= self.index["timestamp"] >= start
+        if end is not None:
+            mask &= self.index["timestamp"] < end
+        return np.flatnonzero(mask)
+
+    def read(self, event_types: Optional[Iterable[str]] = None,
+             start: Optional[float] = None, end: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Parse and return only the matching events, in log order.
+        """
+        rows = self.index[self.select(event_types, start, end)]
+        mm = self._mm
+        return [_parse_line(mm[o:o + n]) for o, n in zip(rows["offset"].tolist(), rows["length"].tolist())]
+
+
+def load_events(run_path: str, event_types: Optional[Iterable[str]] = None,
+                start: Optional[float] = None, end: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Load the events of a run folder, optionally only some event_types
+    and/or a [start, end) time range. Empty if the run has no events.log.
+    """
+    if not os.path.exists(os.path.join(run_path, EVENTS_FILE)):
+        return []
+    with EventLog(run_path) as log:
+        return log.read(event_types, start, end)
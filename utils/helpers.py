@@ -1,8 +1,8 @@
+from utils.records import Match, Message
+
+
 def make_message(**kwargs):
     """
-    Helper function to create a message dictionary.
+    Helper function to create a match_created message.
     """
-    return {
-        "type": "match_created",
-        "payload": kwargs
-    }
+    return Message("match_created", Match(**kwargs))
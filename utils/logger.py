@@ -0,0 +1,79 @@
+"""
+Level- and category-gated logging for the simulation.
+
+Hot paths check enabled() *before* building any message, so a disabled
+log line costs one function call and no string formatting:
+
+    if logger.enabled(logger.DEBUG, "gamelogic"):
+        self._log(f"turn_complete match={match_id} ...")
+
+A log line that passes the gate is printed (unless console output is off)
+and, where the caller does so, recorded as a structured event.
+quiet() turns everything off for headless batch runs.
+"""
+from typing import Iterable, Optional
+
+from config import LOG_LEVEL, LOG_CATEGORIES, LOG_CONSOLE
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+OFF = 100
+
+LEVELS = {"DEBUG": DEBUG, "INFO": INFO, "WARNING": WARNING, "ERROR": ERROR, "OFF": OFF}
+
+_level = DEBUG
+_categories: Optional[frozenset] = None  # None = all categories
+_console = True
+
+
+def _parse_level(level) -> int:
+    if isinstance(level, str):
+        if level.upper() not in LEVELS:
+            raise ValueError(f"Unknown log level: {level}")
+        return LEVELS[level.upper()]
+    return int(level)
+
+
+def configure(level=None, categories: Optional[Iterable[str]] = None, console: Optional[bool] = None):
+    """
+    Set the minimum level, the enabled categories (empty = all) and whether
+    passing log lines are printed.
+    """
+    global _level, _categories, _console
+    if level is not None:
+        _level = _parse_level(level)
+    if categories is not None:
+        categories = frozenset(categories)
+        _categories = categories or None
+    if console is not None:
+        _console = console
+
+
+def quiet():
+    """
+    Headless mode: no log line is formatted, printed or recorded.
+    Errors are still raised (and reported) as usual.
+    """
+    configure(level=OFF)
+
+
+def enabled(level: int, category: str) -> bool:
+    return level >= _level and (_categories is None or category in _categories)
+
+
+def console_enabled() -> bool:
+    return _console
+
+
+def emit(level: int, category: str, msg: str):
+    """
+    Print an already-formatted line if its level/category is enabled.
+    Prefer guarding the call with enabled() when msg is expensive to build.
+    """
+    if _console and enabled(level, category):
+        print(msg)
+
+
+configure(level=LOG_LEVEL, categories=LOG_CATEGORIES, console=LOG_CONSOLE)
@@ -1,29 +1,265 @@
+import glob
 import os
 import time
-from collections import defaultdict
-from typing import Any, Dict, Optional
+from array import array
+from typing import Any, Dict, Iterable, List, Optional
+import numpy as np
 import pandas as pd
+from utils import logger
+from utils.event_log import write_events
+from utils.sketches import LogHistogram, save_sketches
+
+MISSING = -1  # meta code for "key not recorded on this sample"
+
+# meta column kinds: "d" = numeric float64 column, "i" = dictionary-encoded int32 codes
+_MISSING_VALUE = {"d": float("nan"), "i": MISSING}
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class MetricColumns:
+    """
+    Column buffers for one metric: typed arrays for timestamp and value,
+    plus one column per meta key, either numeric (float64, NaN = missing)
+    or dictionary-encoded (int32 codes, MISSING = missing).
+    """
+    def __init__(self):
+        self.timestamps = array("d")
+        self.values = array("d")
+        self.meta: Dict[str, array] = {}
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def append(self, ts: float, value: Any, encoded: Dict[str, Any], kinds: Dict[str, str]):
+        n = len(self.timestamps)
+        self.timestamps.append(ts)
+        try:
+            self.values.append(value)
+        except TypeError:
+            # non-numeric values fall back to a plain object column
+            if isinstance(self.values, array):
+                self.values = list(self.values)
+            self.values.append(value)
+
+        for key, x in encoded.items():
+            col = self.meta.get(key)
+            if col is None:
+                kind = kinds[key]
+                col = self.meta[key] = array(kind, [_MISSING_VALUE[kind]]) * n
+            col.append(x)
+        if len(encoded) < len(self.meta):
+            for col in self.meta.values():
+                if len(col) == n:
+                    col.append(_MISSING_VALUE[col.typecode])
+
+
+class BusyCounter:
+    """
+    Time-weighted number of busy units of a simpy.Resource (connections,
+    game-server slots). Owners call acquire() once a request is granted and
+    release() before giving the unit back; the level is kept here rather
+    than read from Resource.count after a yield, which already includes
+    other requests granted in the same timestep.
+    """
+    def __init__(self, env, capacity: int):
+        self.env = env
+        self.capacity = capacity
+        self.busy = 0
+        self._area = 0.0  # integral of busy units over time
+        self._last_change = env.now
+
+    def _change(self, delta: int):
+        now = self.env.now
+        self._area += self.busy * (now - self._last_change)
+        self._last_change = now
+        self.busy += delta
+
+    def acquire(self):
+        self._change(+1)
+
+    def release(self):
+        self._change(-1)
+
+    def utilization(self) -> float:
+        """Time-weighted fraction of the capacity in use since the start."""
+        now = self.env.now
+        area = self._area + self.busy * (now - self._last_change)
+        return area / (now * self.capacity) if now > 0 else 0.0
+
 
 class MetricsCollector:
     """
     Collects simulation metrics and event logs.
     Saves metrics to CSV and events to a log file.
+
+    events.log holds one JSON object per line, with a sidecar offset index
+    (events.idx) so utils.event_log can filter it by event_type or time
+    without parsing the whole file.
+
+    Metrics are stored column-wise (see MetricColumns). Numeric meta values
+    are kept as float64; everything else is dictionary-encoded against one
+    shared dictionary per meta key, so a sample costs a few bytes instead
+    of a tuple and a dict.
+
+    With stream=True the collector keeps memory bounded: every chunk_size
+    buffered samples/events (or every flush_interval of simulated time, if
+    set) it appends metrics_parts/part-NNNNN.csv and events.log and drops
+    its buffers. load_metrics() reads either layout.
+
+    Metrics named in sketch_metrics are also fed into a constant-memory
+    LogHistogram; save() writes their p50/p95/p99/p999 to quantiles.csv and
+    the mergeable sketches to sketches.json. Metrics named in drop_raw are
+    only sketched, never buffered as raw samples.
     """
-    def __init__(self, out_dir: str):
+    def __init__(self, out_dir: str, stream: bool = False, chunk_size: int = 100_000, flush_interval: float = 0.0,
+                 sketch_metrics: Iterable[str] = (), drop_raw: Iterable[str] = ()):
         self.out_dir = out_dir
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.flush_interval = flush_interval
+        self._sketch_names = set(sketch_metrics) | set(drop_raw)
+        self._drop_raw = set(drop_raw)
         os.makedirs(out_dir, exist_ok=True)
         self.reset()
 
     def reset(self):
-        self.metrics: defaultdict[str, list] = defaultdict(list)
+        self.sketches: Dict[str, LogHistogram] = {name: LogHistogram() for name in self._sketch_names}
+        self._clear_buffers()
+        self._parts = 0
+        self._events_append = False  # truncate events.log on first write, append afterwards
+        self._event_types: Dict[str, int] = {}  # event_type -> code in events.idx
+        self._last_flush_ts = 0.0
+
+    def _clear_buffers(self):
+        self._buffered = 0
+        self.metrics: Dict[str, MetricColumns] = {}
         self.events: list[Dict[str, Any]] = []
+        self._kinds: Dict[str, str] = {}              # meta key -> "d" or "i"
+        self._codes: Dict[str, Dict[Any, int]] = {}   # meta key -> value -> code
+        self._categories: Dict[str, List[Any]] = {}   # meta key -> code -> value
+
+    def _encode(self, key: str, value: Any) -> int:
+        if value is None:
+            return MISSING
+        codes = self._codes.get(key)
+        if codes is None:
+            codes = self._codes[key] = {}
+            self._categories[key] = []
+        try:
+            code = codes.get(value)
+        except TypeError:  # unhashable meta value
+            value = str(value)
+            code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(codes)
+            self._categories[key].append(value)
+        return code
+
+    def _to_dictionary(self, key: str):
+        """
+        Re-encode a numeric meta key as a dictionary key once it sees a
+        non-numeric value.
+        """
+        self._kinds[key] = "i"
+        for cols in self.metrics.values():
+            col = cols.meta.get(key)
+            if col is not None and col.typecode == "d":
+                cols.meta[key] = array("i", (MISSING if x != x else self._encode(key, x) for x in col))
+
+    def _encode_meta(self, meta: Dict[str, Any]) -> Dict[str, Any]:
+        encoded = {}
+        for key, value in meta.items():
+            kind = self._kinds.get(key)
+            if kind is None:
+                kind = self._kinds[key] = "d" if _is_number(value) else "i"
+            if kind == "d":
+                if value is None:
+                    encoded[key] = _MISSING_VALUE["d"]
+                    continue
+                if _is_number(value):
+                    encoded[key] = value
+                    continue
+                self._to_dictionary(key)
+            encoded[key] = self._encode(key, value)
+        return encoded
 
     def record(self, metric_name: str, value: Any, timestamp: Optional[float] = None, **meta: Dict[str, Any]):
         """
         Record a metric value with optional timestamp and metadata.
         """
+        sketch = self.sketches.get(metric_name)
+        if sketch is not None:
+            sketch.add(value)
+            if metric_name in self._drop_raw:
+                return
+
         ts = timestamp if timestamp is not None else time.time()
-        self.metrics[metric_name].append((ts, value, meta or {}))
+        cols = self.metrics.get(metric_name)
+        if cols is None:
+            cols = self.metrics[metric_name] = MetricColumns()
+        cols.append(ts, value, self._encode_meta(meta) if meta else {}, self._kinds)
+        if self.stream:
+            self._maybe_flush(ts)
+
+    def _maybe_flush(self, ts: float):
+        self._buffered += 1
+        if self._buffered >= self.chunk_size or (
+            self.flush_interval and ts - self._last_flush_ts >= self.flush_interval
+        ):
+            self.flush(ts)
+
+    def flush(self, timestamp: Optional[float] = None):
+        """
+        Append everything buffered so far to disk and release the buffers.
+        Each metrics chunk is written to a temp file and renamed, so a crash
+        never leaves a half-written part behind.
+        """
+        df = self.to_frame()
+        if not df.empty:
+            parts_dir = os.path.join(self.out_dir, "metrics_parts")
+            os.makedirs(parts_dir, exist_ok=True)
+            part_file = os.path.join(parts_dir, f"part-{self._parts:05d}.csv")
+            df.to_csv(part_file + ".tmp", index=False)
+            os.replace(part_file + ".tmp", part_file)
+            self._parts += 1
+        self._write_events()
+        self._clear_buffers()
+        if timestamp is not None:
+            self._last_flush_ts = timestamp
+
+    def _write_events(self):
+        events_file = write_events(self.out_dir, self.events, self._event_types, append=self._events_append)
+        self._events_append = True
+        return events_file
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Build the long-format metrics frame (metric, timestamp, value, meta...)
+        directly from the column buffers.
+        """
+        frames = []
+        for name, cols in self.metrics.items():
+            if not len(cols):
+                continue
+            data = {
+                "metric": name,
+                "timestamp": np.array(cols.timestamps, dtype=np.float64),
+                "value": np.array(cols.values, dtype=np.float64) if isinstance(cols.values, array) else cols.values,
+            }
+            for key, col in cols.meta.items():
+                if col.typecode == "d":
+                    data[key] = np.array(col, dtype=np.float64)
+                else:
+                    data[key] = pd.Categorical.from_codes(
+                        np.array(col, dtype=np.int32), categories=pd.Index(self._categories[key], dtype=object)
+                    )
+            frames.append(pd.DataFrame(data))
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True, sort=False)
 
     def log_event(self, event_type: str, payload: Dict[str, Any], timestamp: Optional[float] = None):
         """
@@ -37,31 +273,67 @@ class MetricsCollector:
         }
         self.events.append(event)
         # Optional debug print
-        print(f"[METRICS] {event_type} @ {ts}: {payload}")
+        if logger.console_enabled() and logger.enabled(logger.DEBUG, "metrics"):
+            print(f"[METRICS] {event_type} @ {ts}: {payload}")
+        if self.stream:
+            self._maybe_flush(ts)
 
     def save(self) -> str:
         """
         Save metrics to CSV and events to a log file.
-        Returns the path to the metrics CSV file.
+        Returns the path to the metrics CSV file, or to the metrics_parts
+        folder in streaming mode.
         """
-        # Flatten metrics into rows
-        rows = []
-        for key, values in self.metrics.items():
-            for ts, val, meta in values:
-                row = {"metric": key, "timestamp": ts, "value": val}
-                if meta:
-                    row.update(meta)
-                rows.append(row)
+        if self.sketches:
+            save_sketches(self.sketches, self.out_dir)
+
+        if self.stream:
+            self.flush()
+            return os.path.join(self.out_dir, "metrics_parts")
 
         # Save metrics CSV
-        df = pd.DataFrame(rows)
+        df = self.to_frame()
         metric_file = os.path.join(self.out_dir, "metrics.csv")
         df.to_csv(metric_file, index=False)
 
-        # Save event logs as structured JSON lines
-        events_file = os.path.join(self.out_dir, "events.log")
-        with open(events_file, "w") as f:
-            for ev in self.events:
-                f.write(f"{ev}\n")
+        # Save event logs
+        self._write_events()
 
         return metric_file
+
+
+def load_metrics(run_path: str) -> pd.DataFrame:
+    """
+    Load the metrics of a run folder, whether saved in one piece
+    (metrics.csv) or streamed in chunks (metrics_parts/part-*.csv).
+    """
+    metrics_file = os.path.join(run_path, "metrics.csv")
+    parts = sorted(glob.glob(os.path.join(run_path, "metrics_parts", "part-*.csv")))
+    if os.path.exists(metrics_file):
+        df = pd.read_csv(metrics_file)
+    elif parts:
+        df = pd.concat([pd.read_csv(p) for p in parts], ignore_index=True, sort=False)
+    else:
+        raise FileNotFoundError(f"metrics.csv not found in: {run_path}")
+
+    if "timestamp" in df.columns:
+        df["timestamp"] = pd.to_numeric(df["timestamp"], errors="coerce")
+    return df
+
+
+def summarize_metrics(df: pd.DataFrame) -> Dict[str, float]:
+    """
+    Reduce a metrics frame (as written by MetricsCollector.save) to one row
+    of per-metric count / mean / p95 values.
+    """
+    summary: Dict[str, float] = {}
+    if df.empty:
+        return summary
+
+    values = pd.to_numeric(df["value"], errors="coerce")
+    for metric, v in values.groupby(df["metric"]):
+        v = v.dropna()
+        summary[f"{metric}_count"] = float(len(v))
+        summary[f"{metric}_mean"] = float(v.mean()) if len(v) else 0.0
+        summary[f"{metric}_95p"] = float(v.quantile(0.95)) if len(v) else 0.0
+    return summary
@@ -0,0 +1,69 @@
+"""
+Compact record types for the entities that are alive in large numbers
+during a run: players, matches and the pubsub messages carrying them.
+
+Player is a __slots__ class (its auth/match fields are filled in as it
+moves through the services); Match, TurnCompleted and the Message
+envelope are immutable NamedTuples. None of them carries a per-instance
+__dict__.
+"""
+import random
+from typing import Any, List, NamedTuple, Optional
+
+DEFAULT_SKILL = 50  # skill assumed for players that do not carry one
+
+
+class Player:
+    __slots__ = ("id", "skill", "_name", "arrival_time", "auth_latency", "match_id", "is_bot")
+
+    def __init__(self, player_id, skill: int = None, name: str = None, arrival_time: float = None):
+        self.id = player_id
+        self.skill = skill if skill is not None else random.randint(1, 100)
+        self._name = name                 # None: derived from the id on access
+        self.arrival_time = arrival_time  # can be set later
+        self.auth_latency = None          # optional extra attributes
+        self.match_id = None
+        self.is_bot = False
+
+    @property
+    def name(self) -> str:
+        return self._name if self._name is not None else f"player_{self.id}"
+
+    @name.setter
+    def name(self, value: str):
+        self._name = value
+
+    def __repr__(self):
+        return f"{type(self).__name__}(id={self.id!r}, skill={self.skill})"
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "skill": self.skill,
+            "name": self.name,
+            "arrival_time": self.arrival_time,
+            "auth_latency": self.auth_latency,
+            "match_id": self.match_id
+        }
+
+
+class Match(NamedTuple):
+    match_id: Any
+    players: List[Player]
+    ts: float
+
+
+class TurnCompleted(NamedTuple):
+    match_id: Any
+    turn: int
+    by: Any
+    ts: float
+
+
+class Message(NamedTuple):
+    """
+    Pubsub envelope: the message type and its record (Player, Match,
+    TurnCompleted, ...). Consumers unpack it as `mtype, payload = msg`.
+    """
+    type: str
+    payload: Optional[Any] = None
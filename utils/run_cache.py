@@ -0,0 +1,94 @@
+import glob
+import os
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from utils.metrics import load_metrics
+
+try:
+    import pyarrow  # noqa: F401  (parquet engine)
+    CACHE_FILE = "metrics.cache.parquet"
+except ImportError:
+    CACHE_FILE = "metrics.cache.pkl"
+
+
+def _source_files(run_path: str) -> List[str]:
+    metrics_file = os.path.join(run_path, "metrics.csv")
+    if os.path.exists(metrics_file):
+        return [metrics_file]
+    return sorted(glob.glob(os.path.join(run_path, "metrics_parts", "part-*.csv")))
+
+
+class RunData:
+    """
+    Metrics of one run, indexed by metric.
+
+    The frame is sorted by (metric, timestamp) with a categorical metric
+    column, so each metric is one contiguous block: metric(name) returns
+    a zero-copy slice that is already in time order instead of
+    re-filtering every row with df[df["metric"] == name].
+    """
+
+    def __init__(self, df: pd.DataFrame, presorted: bool = False):
+        if not df.empty and not presorted:
+            df = df.assign(metric=df["metric"].astype("category"), value=pd.to_numeric(df["value"], errors="coerce"))
+            for col in df.columns.drop(["metric", "timestamp", "value"], errors="ignore"):
+                # string meta (match_id, topic, ...) repeats heavily
+                if df[col].dtype == object and pd.api.types.infer_dtype(df[col], skipna=True) == "string":
+                    df[col] = df[col].astype("category")
+            df = df.sort_values(["metric", "timestamp"], kind="stable").reset_index(drop=True)
+        self.df = df
+        self._slices: Dict[str, slice] = {}
+        if not df.empty:
+            codes = df["metric"].cat.codes.to_numpy()
+            starts = np.r_[0, np.flatnonzero(np.diff(codes)) + 1]
+            ends = np.r_[starts[1:], len(codes)]
+            categories = df["metric"].cat.categories
+            for s, e in zip(starts.tolist(), ends.tolist()):
+                self._slices[str(categories[codes[s]])] = slice(s, e)
+        self._empty = df.iloc[0:0]
+
+    def __len__(self):
+        return len(self.df)
+
+    @property
+    def metrics(self) -> List[str]:
+        return list(self._slices)
+
+    def metric(self, name: str) -> pd.DataFrame:
+        sl = self._slices.get(name)
+        return self._empty if sl is None else self.df.iloc[sl]
+
+    def values(self, name: str) -> pd.Series:
+        return self.metric(name)["value"]
+
+
+def load_run(run_path: str, refresh: bool = False) -> RunData:
+    """
+    Load a run folder's metrics through a columnar cache next to the run
+    (parquet if pyarrow is installed, pickle otherwise). The cache is
+    rebuilt from metrics.csv / metrics_parts when it is missing or older
+    than its sources.
+    """
+    sources = _source_files(run_path)
+    if not sources:
+        raise FileNotFoundError(f"metrics.csv not found in: {run_path}")
+    cache = os.path.join(run_path, CACHE_FILE)
+
+    if not refresh and os.path.exists(cache) and os.path.getmtime(cache) >= max(map(os.path.getmtime, sources)):
+        if cache.endswith(".parquet"):
+            df = pd.read_parquet(cache)
+        else:
+            df = pd.read_pickle(cache)
+        return RunData(df, presorted=True)
+
+    run = RunData(load_metrics(run_path))
+    tmp = cache + ".tmp"
+    if cache.endswith(".parquet"):
+        run.df.to_parquet(tmp, index=False)
+    else:
+        run.df.to_pickle(tmp)
+    os.replace(tmp, cache)
+    return run
@@ -0,0 +1,146 @@
+import json
+import math
+import os
+from typing import Dict, Iterable
+import pandas as pd
+
+SKETCHES_FILE = "sketches.json"
+QUANTILES_FILE = "quantiles.csv"
+REPORTED_QUANTILES = {"p50": 0.5, "p95": 0.95, "p99": 0.99, "p999": 0.999}
+
+
+class LogHistogram:
+    """
+    Streaming quantile sketch with bounded relative error (log-bucketed,
+    HDR-histogram style).
+
+    Positive values fall into geometric buckets of ratio
+    gamma = (1 + rel_error) / (1 - rel_error), so every reported quantile
+    is within rel_error of a true sample value. Memory depends only on the
+    dynamic range of the data (about 700 buckets per 6 decades at 1%), not
+    on the number of samples. Values <= min_value are counted in a single
+    zero bucket. Sketches with the same rel_error merge by adding counts.
+    """
+
+    def __init__(self, rel_error: float = 0.01, min_value: float = 1e-9):
+        self.rel_error = rel_error
+        self.min_value = min_value
+        self._gamma = (1 + rel_error) / (1 - rel_error)
+        self._log_gamma = math.log(self._gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if value <= self.min_value:
+            self.zero_count += 1
+            return
+        idx = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[idx] = self.buckets.get(idx, 0) + 1
+
+    def merge(self, other: "LogHistogram") -> "LogHistogram":
+        if other.rel_error != self.rel_error:
+            raise ValueError("Cannot merge sketches with different rel_error")
+        for idx, n in other.buckets.items():
+            self.buckets[idx] = self.buckets.get(idx, 0) + n
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return min(max(0.0, self.min), self.max)
+        for idx in sorted(self.buckets):
+            seen += self.buckets[idx]
+            if rank < seen:
+                # midpoint (in relative terms) of the bucket (gamma^(idx-1), gamma^idx]
+                estimate = 2 * self._gamma ** idx / (self._gamma + 1)
+                return min(max(estimate, self.min), self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        row = {"count": self.count, "mean": self.mean, "min": self.min, "max": self.max}
+        for label, q in REPORTED_QUANTILES.items():
+            row[label] = self.quantile(q)
+        return row
+
+    def to_dict(self) -> dict:
+        return {
+            "rel_error": self.rel_error,
+            "min_value": self.min_value,
+            "buckets": {str(k): v for k, v in self.buckets.items()},
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "total": self.total,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LogHistogram":
+        sketch = cls(rel_error=data["rel_error"], min_value=data["min_value"])
+        sketch.buckets = {int(k): v for k, v in data["buckets"].items()}
+        sketch.zero_count = data["zero_count"]
+        sketch.count = data["count"]
+        sketch.total = data["total"]
+        sketch.min = data["min"] if data["min"] is not None else math.inf
+        sketch.max = data["max"] if data["max"] is not None else -math.inf
+        return sketch
+
+
+def save_sketches(sketches: Dict[str, LogHistogram], out_dir: str) -> str:
+    """
+    Write sketches.json (mergeable) and quantiles.csv (readable) into out_dir.
+    """
+    path = os.path.join(out_dir, SKETCHES_FILE)
+    with open(path, "w") as f:
+        json.dump({name: s.to_dict() for name, s in sketches.items()}, f)
+
+    rows = [{"metric": name, **s.summary()} for name, s in sketches.items() if s.count]
+    pd.DataFrame(rows).to_csv(os.path.join(out_dir, QUANTILES_FILE), index=False)
+    return path
+
+
+def load_sketches(run_path: str) -> Dict[str, LogHistogram]:
+    """
+    Load the sketches saved for a run; empty if the run has none.
+    """
+    path = os.path.join(run_path, SKETCHES_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return {name: LogHistogram.from_dict(d) for name, d in json.load(f).items()}
+
+
+def merge_sketches(runs: Iterable[Dict[str, LogHistogram]]) -> Dict[str, LogHistogram]:
+    """
+    Merge per-run sketch dicts metric by metric (e.g. across replications).
+    """
+    merged: Dict[str, LogHistogram] = {}
+    for sketches in runs:
+        for name, sketch in sketches.items():
+            if name in merged:
+                merged[name].merge(sketch)
+            else:
+                merged[name] = LogHistogram.from_dict(sketch.to_dict())
+    return merged
@@ -0,0 +1,202 @@
+import os
+import tempfile
+import zipfile
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.records import DEFAULT_SKILL
+
+INDEX_FILE = "trace.idx.npz"
+ARRIVALS_FILE = "arrivals.npy"   # players table pre-converted for memory-mapping
+ARRIVALS_DTYPE = np.dtype([("player_id", "<i8"), ("arrival_time", "<f8"), ("skill", "<i4")])
+TABLE_SUFFIXES = (".csv", ".csv.gz", ".parquet")  # data_gen.writers.FORMATS
+
+
+def _table_path(data_path: str, name: str) -> str:
+    for suffix in TABLE_SUFFIXES:
+        path = os.path.join(data_path, name + suffix)
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"Trace table not found: {os.path.join(data_path, name)}.csv")
+
+
+def _save_cache(cache_file: str, save) -> None:
+    """
+    Write a cache file next to the tables via save(fileobj): into a temp
+    file unique to this process, then os.replace()d over cache_file, so
+    parallel runs sharing a trace folder never read each other's partial
+    writes. Failures (e.g. a read-only folder) just skip the cache.
+    """
+    folder, name = os.path.split(cache_file)
+    try:
+        fd, tmp_file = tempfile.mkstemp(dir=folder or ".", prefix=name + ".", suffix=os.path.splitext(name)[1])
+    except OSError:
+        return
+    try:
+        with os.fdopen(fd, "wb") as f:
+            save(f)
+        os.chmod(tmp_file, 0o644)  # mkstemp creates owner-only files
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        pass  # rebuilt next time
+    finally:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+
+
+def _read_table(path: str, columns) -> pd.DataFrame:
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path, columns=columns)
+    return pd.read_csv(path, usecols=columns, float_precision="round_trip")
+
+
+class MatchTrace:
+    """
+    Recorded matches and turns (players/matches/turns tables as written by
+    data_gen or exported from production), indexed for replay.
+
+    Turns are held as flat arrays sorted by (match_id, turn_index); the
+    turns of the i-th match are durations[offsets[i]:offsets[i + 1]], so a
+    lookup is one binary search and two slices, with no per-turn objects.
+    Players map to the match they played in the trace.
+    """
+
+    def __init__(self, match_ids, offsets, durations, pubsub_delays, dropout, player_ids, player_matches):
+        self.match_ids = match_ids
+        self.offsets = offsets
+        self.durations = durations
+        self.pubsub_delays = pubsub_delays
+        self.dropout = dropout
+        self.player_ids = player_ids
+        self.player_matches = player_matches
+
+    def __len__(self):
+        return len(self.match_ids)
+
+    # -------------------------------------------------------------
+    # Loading
+    # -------------------------------------------------------------
+    @classmethod
+    def from_tables(cls, data_path: str) -> "MatchTrace":
+        turns = _read_table(_table_path(data_path, "turns"), ["match_id", "turn_index", "duration", "pubsub_delay"])
+        matches = _read_table(_table_path(data_path, "matches"), ["match_id", "dropout"])
+        players = _read_table(_table_path(data_path, "players"), ["player_id", "match_id"])
+
+        turn_match = turns["match_id"].to_numpy(np.int64)
+        order = None
+        if np.any(np.diff(turn_match) < 0):
+            order = np.lexsort((turns["turn_index"].to_numpy(), turn_match))
+            turn_match = turn_match[order]
+        durations = turns["duration"].to_numpy(np.float64)
+        pubsub_delays = turns["pubsub_delay"].to_numpy(np.float64)
+        if order is not None:
+            durations, pubsub_delays = durations[order], pubsub_delays[order]
+
+        # one entry per match in matches.csv; matches without turns get an empty slice
+        matches = matches.sort_values("match_id", kind="stable")
+        match_ids = matches["match_id"].to_numpy(np.int64)
+        known = np.isin(turn_match, match_ids)
+        if not known.all():  # turns of unknown matches would spill into a neighbour's slice
+            turn_match, durations, pubsub_delays = turn_match[known], durations[known], pubsub_delays[known]
+        offsets = np.r_[np.searchsorted(turn_match, match_ids), len(turn_match)]
+        dropout = matches["dropout"].astype(str).str.lower().isin(("1", "true")).to_numpy()
+
+        players = players.sort_values("player_id", kind="stable")
+        return cls(match_ids, offsets, durations, pubsub_delays, dropout,
+                   players["player_id"].to_numpy(np.int64), players["match_id"].to_numpy(np.int64))
+
+    @classmethod
+    def load(cls, data_path: str, refresh: bool = False) -> "MatchTrace":
+        """
+        Load the trace in data_path, from its cached binary index
+        (trace.idx.npz) when that is newer than every table.
+        """
+        index_file = os.path.join(data_path, INDEX_FILE)
+        sources = [_table_path(data_path, name) for name in ("players", "matches", "turns")]
+        if not refresh and os.path.exists(index_file) and \
+                os.path.getmtime(index_file) >= max(os.path.getmtime(p) for p in sources):
+            try:
+                with np.load(index_file) as data:
+                    return cls(**{name: data[name] for name in data.files})
+            except (OSError, ValueError, EOFError, zipfile.BadZipFile):
+                pass  # unreadable index: rebuilt from the tables
+
+        trace = cls.from_tables(data_path)
+        _save_cache(index_file, lambda f: np.savez(f, **vars(trace)))
+        return trace
+
+    # -------------------------------------------------------------
+    # Lookup
+    # -------------------------------------------------------------
+    def _match_index(self, match_id) -> Optional[int]:
+        i = int(np.searchsorted(self.match_ids, match_id))
+        if i < len(self.match_ids) and self.match_ids[i] == match_id:
+            return i
+        return None
+
+    def match_of(self, player_id) -> Optional[int]:
+        """Trace match the player played in, or None."""
+        try:
+            player_id = int(player_id)
+        except (TypeError, ValueError):
+            return None  # bots and other non-trace players
+        i = int(np.searchsorted(self.player_ids, player_id))
+        if i < len(self.player_ids) and self.player_ids[i] == player_id:
+            return int(self.player_matches[i])
+        return None
+
+    def turns(self, match_id) -> Optional[Tuple[np.ndarray, np.ndarray, bool]]:
+        """
+        (turn durations, pubsub delays, dropout) of a trace match, or None
+        if it is not in the trace.
+        """
+        i = self._match_index(match_id)
+        if i is None:
+            return None
+        s, e = self.offsets[i], self.offsets[i + 1]
+        return self.durations[s:e], self.pubsub_delays[s:e], bool(self.dropout[i])
+
+
+# ---------------------------------------------------------
+# Player arrivals
+# ---------------------------------------------------------
+def _read_arrivals(players_file: str) -> np.ndarray:
+    if players_file.endswith(".parquet"):
+        df = pd.read_parquet(players_file)
+    else:
+        header = pd.read_csv(players_file, nrows=0).columns
+        usecols = [c for c in ("player_id", "arrival_time", "skill") if c in header]
+        # round_trip parses floats exactly like float(), so replayed times match the CSV to the bit
+        df = pd.read_csv(players_file, usecols=usecols, dtype={c: np.float64 for c in usecols} | {"player_id": np.int64},
+                         float_precision="round_trip")
+    arrivals = np.empty(len(df), dtype=ARRIVALS_DTYPE)
+    arrivals["player_id"] = df["player_id"].to_numpy()
+    arrivals["arrival_time"] = df["arrival_time"].to_numpy()
+    arrivals["skill"] = df["skill"].to_numpy() if "skill" in df.columns else DEFAULT_SKILL
+    # sorted once here, so a replay only walks the array
+    if np.any(np.diff(arrivals["arrival_time"]) < 0):
+        arrivals = arrivals[np.argsort(arrivals["arrival_time"], kind="stable")]
+    return arrivals
+
+
+def load_arrivals(data_path: str, refresh: bool = False) -> np.ndarray:
+    """
+    Player arrivals of a trace as one structured array (player_id,
+    arrival_time, skill) sorted by arrival time. The players table is
+    parsed column-wise once and saved as arrivals.npy next to it; later
+    loads memory-map that file (while it is newer than the table).
+    """
+    players_file = _table_path(data_path, "players")
+    cache_file = os.path.join(data_path, ARRIVALS_FILE)
+    if not refresh and os.path.exists(cache_file) and os.path.getmtime(cache_file) >= os.path.getmtime(players_file):
+        try:
+            return np.load(cache_file, mmap_mode="r")
+        except (OSError, ValueError, EOFError):
+            pass  # unreadable cache: parsed again
+
+    arrivals = _read_arrivals(players_file)
+    _save_cache(cache_file, lambda f: np.save(f, arrivals))
+    return arrivals
+
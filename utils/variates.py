@@ -0,0 +1,70 @@
+import zlib
+from typing import Dict
+
+import numpy as np
+
+from config import RANDOM_SEED
+
+DEFAULT_BLOCK_SIZE = 8192
+
+
+class VariateStream:
+    """
+    One independent random stream that hands out pre-drawn variates.
+    Standard normals and uniforms are drawn from NumPy in blocks and
+    refilled lazily, so each call is a list lookup instead of an
+    interpreter-level RNG call.
+    """
+
+    def __init__(self, seed_seq: np.random.SeedSequence, block_size: int = DEFAULT_BLOCK_SIZE):
+        self._rng = np.random.Generator(np.random.PCG64(seed_seq))
+        self.block_size = block_size
+        self._normals = []
+        self._normal_i = 0
+        self._uniforms = []
+        self._uniform_i = 0
+
+    def gauss(self, mu: float, sigma: float) -> float:
+        i = self._normal_i
+        if i >= len(self._normals):
+            self._normals = self._rng.standard_normal(self.block_size).tolist()
+            i = 0
+        self._normal_i = i + 1
+        return mu + sigma * self._normals[i]
+
+    def random(self) -> float:
+        i = self._uniform_i
+        if i >= len(self._uniforms):
+            self._uniforms = self._rng.random(self.block_size).tolist()
+            i = 0
+        self._uniform_i = i + 1
+        return self._uniforms[i]
+
+
+class VariateBank:
+    """
+    Seeded source of named, mutually independent VariateStreams.
+    The same (seed, name) pair always yields the same sequence, no matter
+    which other streams exist or in which order they are requested.
+    """
+
+    def __init__(self, seed: int = RANDOM_SEED, block_size: int = DEFAULT_BLOCK_SIZE):
+        self.seed = seed
+        self.block_size = block_size
+        self._streams: Dict[str, VariateStream] = {}
+
+    def _seed_seq(self, name: str) -> np.random.SeedSequence:
+        return np.random.SeedSequence([self.seed, zlib.crc32(name.encode())])
+
+    def stream(self, name: str) -> VariateStream:
+        if name not in self._streams:
+            self._streams[name] = VariateStream(self._seed_seq(name), self.block_size)
+        return self._streams[name]
+
+    def generator(self, name: str) -> np.random.Generator:
+        """
+        A plain NumPy Generator for consumers that draw whole arrays
+        (e.g. utils.arrivals). Same independence guarantee as stream();
+        each call returns a fresh generator at the start of the sequence.
+        """
+        return np.random.Generator(np.random.PCG64(self._seed_seq(name)))
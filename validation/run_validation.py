@@ -1,52 +1,104 @@
 # run_validation.py
+import argparse
 import os
+import sys
 import glob
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 import pandas as pd
 
+# Plots are rendered off-screen, possibly in worker processes
+import matplotlib
+matplotlib.use("Agg")
+
 from validation_scripts.verify_queue_match import verify_queue_match
 from validation_scripts.verify_turns_latency import verify_turns_latency
 from validation_scripts.verify_pubsub import verify_pubsub
 from validation_scripts.verify_arrivals import verify_arrivals
 
+# Fix import resolution when run as a script
+sys.path.append(str(Path(__file__).parent.parent.resolve()))
+
+from utils import metrics as metrics_io
+from utils.run_cache import load_run
+from utils.sketches import load_sketches
+
 # -------------------------------
 # Load metrics CSV
 # -------------------------------
 def load_metrics(run_path):
-    metrics_file = os.path.join(run_path, "metrics.csv")
-    if not os.path.exists(metrics_file):
-        raise FileNotFoundError(f"metrics.csv not found in {run_path}")
-    df = pd.read_csv(metrics_file)
-    if "timestamp" in df.columns:
-        df["timestamp"] = pd.to_numeric(df["timestamp"], errors="coerce")
-    return df
+    # metrics.csv or streamed metrics_parts/ chunks
+    return metrics_io.load_metrics(run_path)
+
+# -------------------------------
+# Plot rendering
+# -------------------------------
+def _render(job):
+    fn, *args = job
+    fn(*args)
+
+def render_plots(jobs, workers=None):
+    """
+    Render (plot_fn, *args) jobs collected by the verify_* checks across a
+    process pool (inline for a single job or worker).
+    """
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers <= 1:
+        for job in jobs:
+            _render(job)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(_render, jobs))
+
+# -------------------------------
+# Validation pass
+# -------------------------------
+def validate_run(run_path, results_dir, plots=True, workers=None):
+    """
+    Run every check on one run: the metrics are split by metric once
+    (utils.run_cache), the checks compute their statistics in one pass and
+    queue their figures, which are then rendered in parallel.
+    Returns the summary row.
+    """
+    run = load_run(run_path)
+    os.makedirs(results_dir, exist_ok=True)
+
+    jobs = [] if plots else None
+    queue_stats = verify_queue_match(run, results_dir, plots=jobs)
+    turn_stats = verify_turns_latency(run, results_dir, sketch=load_sketches(run_path).get("turn_latency"), plots=jobs)
+    pubsub_stats = verify_pubsub(run, results_dir, plots=jobs)
+    arrivals_stats = verify_arrivals(run, results_dir, plots=jobs)
+
+    if jobs:
+        render_plots(jobs, workers=workers)
+
+    return {**queue_stats, **turn_stats, **pubsub_stats, **arrivals_stats}
 
 # -------------------------------
 # Main validation runner
 # -------------------------------
 def main():
+    parser = argparse.ArgumentParser(description="Validate a simulation run")
+    parser.add_argument("--run", default=None, help="Path to run folder (default: latest outputs/run_*)")
+    parser.add_argument("--no-plots", action="store_true", help="Only compute the checks and the summary (fast, for CI)")
+    parser.add_argument("--workers", type=int, default=None, help="Plot rendering processes (default: CPU count)")
+    args = parser.parse_args()
+
     # Auto-detect latest run folder relative to project root
     project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-    runs = sorted(glob.glob(os.path.join(project_root, "outputs/run_*")), reverse=True)
-    if not runs:
-        raise Exception("No run folders found in outputs/")
-    run_path = runs[0]
+    run_path = args.run
+    if not run_path:
+        runs = sorted(glob.glob(os.path.join(project_root, "outputs/run_*")), reverse=True)
+        if not runs:
+            raise Exception("No run folders found in outputs/")
+        run_path = runs[0]
     print(f"[INFO] Validating run: {run_path}")
 
-    # Load metrics
-    metrics_df = load_metrics(run_path)
-
     # Ensure results folder exists
     results_dir = os.path.join(project_root, "validation/results")
-    os.makedirs(results_dir, exist_ok=True)
-
-    # Run validation scripts
-    queue_stats = verify_queue_match(metrics_df, results_dir)
-    turn_stats = verify_turns_latency(metrics_df, results_dir)
-    pubsub_stats = verify_pubsub(metrics_df, results_dir)
-    arrivals_stats = verify_arrivals(metrics_df, results_dir)
 
     # Aggregate summary
-    summary = {**queue_stats, **turn_stats, **pubsub_stats, **arrivals_stats}
+    summary = validate_run(run_path, results_dir, plots=not args.no_plots, workers=args.workers)
     summary_df = pd.DataFrame([summary])
     summary_csv = os.path.join(results_dir, "validation_summary.csv")
     summary_df.to_csv(summary_csv, index=False)
@@ -3,24 +3,31 @@ import os
 import pandas as pd
 import matplotlib.pyplot as plt
 
-def verify_arrivals(metrics_df, outdir):
-    arrivals = metrics_df[metrics_df['metric'] == "auth_latency"]
-    if arrivals.empty:
-        return {"num_players": 0}
-
-    num_players = len(arrivals)
-    print(f"[ARRIVALS] Total players authenticated: {num_players}")
-
-    # Plot histogram of auth_latency
+def plot_auth_latency(values, path):
     plt.figure(figsize=(8,5))
-    plt.hist(arrivals['value'], bins=40, alpha=0.7)
+    plt.hist(values, bins=40, alpha=0.7)
     plt.title("Player Authentication Latency")
     plt.xlabel("Latency (s)")
     plt.ylabel("Count")
     plt.tight_layout()
-    path = os.path.join(outdir, "auth_latency.png")
     plt.savefig(path)
     plt.close()
     print(f"[ARRIVALS] Saved plot: {path}")
 
+def verify_arrivals(run, outdir, plots=None):
+    """
+    run is a utils.run_cache.RunData; plot jobs are appended to plots
+    (skipped when plots is None).
+    """
+    arrivals = run.metric("auth_latency")
+    if arrivals.empty:
+        return {"num_players": 0}
+
+    num_players = len(arrivals)
+    print(f"[ARRIVALS] Total players authenticated: {num_players}")
+
+    # Plot histogram of auth_latency
+    if plots is not None:
+        plots.append((plot_auth_latency, arrivals['value'].to_numpy(), os.path.join(outdir, "auth_latency.png")))
+
     return {"num_players": num_players}
@@ -3,32 +3,35 @@ import os
 import pandas as pd
 import matplotlib.pyplot as plt
 
-def verify_pubsub(metrics_df, outdir):
-    pub = metrics_df[metrics_df['metric'].str.contains("pubsub")]
-    if pub.empty:
+def plot_retries(retry_counts, path):
+    plt.figure(figsize=(10,5))
+    plt.bar(retry_counts.index, retry_counts.values, width=0.05, alpha=0.7)
+    plt.title("PubSub Retries Over Time")
+    plt.xlabel("Time")
+    plt.ylabel("Retry Count")
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+    print(f"[PUBSUB] Saved plot: {path}")
+
+def verify_pubsub(run, outdir, plots=None):
+    """
+    run is a utils.run_cache.RunData; plot jobs are appended to plots
+    (skipped when plots is None).
+    """
+    if not any("pubsub" in m for m in run.metrics):
         return {"total_delivered": 0, "total_retries": 0}
 
-    delivered = pub[pub['metric'] == "pubsub_delivered"]['value'].sum()
-    retries = pub[pub['metric'] == "pubsub_retry"]['value'].sum()
+    retries_df = run.metric("pubsub_retry")
+    delivered = run.values("pubsub_delivered").sum()
+    retries = retries_df['value'].sum()
 
     print(f"[PUBSUB] Total delivered: {delivered}, Total retries: {retries}")
 
     # Plot retries over time
-    retries_df = pub[pub['metric'] == "pubsub_retry"]
-    if not retries_df.empty:
+    if not retries_df.empty and plots is not None:
         # Group retries by timestamp to count occurrences
         retry_counts = retries_df.groupby('timestamp').size()
-
-        # Plot retries counts over time
-        plt.figure(figsize=(10,5))
-        plt.bar(retry_counts.index, retry_counts.values, width=0.05, alpha=0.7)
-        plt.title("PubSub Retries Over Time")
-        plt.xlabel("Time")
-        plt.ylabel("Retry Count")
-        plt.tight_layout()
-        path = os.path.join(outdir, "pubsub_retries_over_time.png")
-        plt.savefig(path)
-        plt.close()
-        print(f"[PUBSUB] Saved plot: {path}")
+        plots.append((plot_retries, retry_counts, os.path.join(outdir, "pubsub_retries_over_time.png")))
 
     return {"total_delivered": delivered, "total_retries": retries}
@@ -3,9 +3,28 @@ import os
 import pandas as pd
 import matplotlib.pyplot as plt
 
-def verify_turns_latency(metrics_df, outdir):
-    d = metrics_df[metrics_df['metric'] == 'turn_latency']
+def plot_turn_latency(values, path):
+    plt.figure(figsize=(8,5))
+    plt.hist(values, bins=40, alpha=0.7)
+    plt.title("Turn Latency Distribution")
+    plt.xlabel("Latency (s)")
+    plt.ylabel("Count")
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+    print(f"[TURN LATENCY] Saved plot: {path}")
+
+def verify_turns_latency(run, outdir, sketch=None, plots=None):
+    """
+    run is a utils.run_cache.RunData; plot jobs are appended to plots
+    (skipped when plots is None).
+    """
+    d = run.metric('turn_latency')
     if d.empty:
+        # raw samples dropped: fall back to the run's quantile sketch
+        if sketch is not None and sketch.count:
+            print(f"[TURN LATENCY] Mean: {sketch.mean:.3f}, 95th percentile: {sketch.quantile(0.95):.3f} (sketch)")
+            return {"mean": sketch.mean, "p95": sketch.quantile(0.95)}
         return {"mean": 0, "p95": 0}
 
     mean_latency = d['value'].mean()
@@ -14,15 +33,7 @@ def verify_turns_latency(metrics_df, outdir):
     print(f"[TURN LATENCY] Mean: {mean_latency:.3f}, 95th percentile: {p95_latency:.3f}")
 
     # Plot histogram
-    plt.figure(figsize=(8,5))
-    plt.hist(d['value'], bins=40, alpha=0.7)
-    plt.title("Turn Latency Distribution")
-    plt.xlabel("Latency (s)")
-    plt.ylabel("Count")
-    plt.tight_layout()
-    path = os.path.join(outdir, "turn_latency.png")
-    plt.savefig(path)
-    plt.close()
-    print(f"[TURN LATENCY] Saved plot: {path}")
+    if plots is not None:
+        plots.append((plot_turn_latency, d['value'].to_numpy(), os.path.join(outdir, "turn_latency.png")))
 
     return {"mean": mean_latency, "p95": p95_latency}